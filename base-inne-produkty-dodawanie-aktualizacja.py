@@ -1,188 +1,112 @@
 import io
-from io import BytesIO
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from shoperxml.descriptions import open_descriptions, with_descriptions
+from shoperxml.diff import diff_key, diff_with_previous
+from shoperxml.export import XLSX_MIME, csv_bytes, export_key, exports_for, xlsx_bytes
+from shoperxml.filters import exclusion_report
+from shoperxml.metrics import run_records, stage, start_run
+from shoperxml.multi_feed import read_xml_urls
+from shoperxml.prepared import PreparedDataset, dataset_key
+from shoperxml.schema import SHOPER_COLUMNS, missing_columns
+from shoperxml.tables import read_csv_url, read_id_list, read_table_file
+from shoperxml.view import PAGE_SIZES, page_count, page_slice, sort_positions
+from shoperxml.xml_feed import read_xml_url
+
 st.set_page_config(page_title="Filtr ofert – CSV/XLSX lub XML", layout="wide")
 st.title("⚙️ Filtr ofert – CSV/XLSX lub XML")
 st.caption("Wybierz tryb na górze. CSV/XLSX – pełne filtry (włączane przełącznikiem). XML – filtry podstawowe lub automatyczne filtry zaawansowane z atrybutów.")
 
+start_run()  # pomiary etapów (shoperxml.metrics) – lista per rerun
+
 # ---------- Helpers ----------
 @st.cache_data(show_spinner=False)
 def read_any_table(file) -> pd.DataFrame:
-    name = file.name.lower()
-    if name.endswith((".xlsx", ".xlsm", ".xls")):
-        return pd.read_excel(file)
-    try:
-        df = pd.read_csv(file, sep=None, engine="python")
-    except Exception:
-        file.seek(0)
-        df = pd.read_csv(file, sep=",", engine="python")
-    return df
+    return read_table_file(file)
 
-@st.cache_data(show_spinner=False)
-def to_excel_bytes(df: pd.DataFrame) -> bytes:
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="dane")
-    return output.getvalue()
+@st.cache_data(show_spinner=False, max_entries=8)
+def to_excel_bytes(key: str, _df: pd.DataFrame) -> bytes:
+    # key = export_key(wersja zbioru, filtry, kolumny) – ramka (_df) nie jest hashowana;
+    # zapis strumieniowy (openpyxl write-only, porcjami) przez plik tymczasowy
+    return xlsx_bytes(_df)
 
 @st.cache_data(show_spinner=False, ttl=1800)  # 30 minut
-def read_xml_build_df(url: str) -> pd.DataFrame:
-    import xml.etree.ElementTree as ET
-    from urllib.request import urlopen
-
-    raw = urlopen(url).read()
-    root = ET.fromstring(raw)
-
-    rows = []
-    max_imgs = 0  # maks liczba zdjęć
-
-    for o in root.findall(".//o"):
-        oid   = (o.get("id") or "").strip()
-        ourl  = (o.get("url") or "").strip()
-        price = (o.get("price") or "").strip()
-        avail = (o.get("avail") or "").strip()
-        stock = (o.get("stock") or "").strip()
-        cat   = (o.findtext("cat")  or "").strip()
-        subcat = (o.findtext("subcat") or "").strip()
-        name  = (o.findtext("name") or "").strip()
-
-        # --- Opis HTML ---
-        desc_html = ""
-        desc_el = o.find("desc")
-        if desc_el is not None:
-            desc_html = "".join(
-                ET.tostring(child, encoding="unicode", method="xml")
-                for child in list(desc_el)
-            ).strip() or (desc_el.text or "").strip()
-
-        # --- Zdjęcia ---
-        images = []
-        imgs_el = o.find("imgs")
-        if imgs_el is not None:
-            main_el = imgs_el.find("main")
-            if main_el is not None:
-                main_img = (main_el.get("url") or "").strip()
-                if main_img:
-                    images.append(main_img)
-            for i_el in imgs_el.findall("i"):
-                u = (i_el.get("url") or "").strip()
-                if u:
-                    images.append(u)
-
-        max_imgs = max(max_imgs, len(images))
-
-        # --- Atrybuty (jako osobne kolumny!) ---
-        producent = ""
-        extra = {}
-        attrs_el = o.find("attrs")
-        if attrs_el is not None:
-            for a in attrs_el.findall("a"):
-                k = (a.get("name") or "").strip()
-                v = (a.text or "").strip()
-                if not k:
-                    continue
-                extra[k] = v
-                if k.lower() == "producent":
-                    producent = v
-
-        # --- Docelowe nagłówki ---
-        row = {
-            "Nazwa kategorii": cat,
-            "Podkategoria": subcat,
-            "Nazwa producenta": producent,
-            "Nazwa produktu (PL)": name,
-            "Cena (Domyślna (PLN))": str(price).replace(",", "."),
-            "Dostępność": 1 if avail in {"1", "true", "True", "tak", "TAK"} else 99,
-            "Ilość (Domyślny)": stock,
-            "ID": oid,
-            "SKU": oid,  # SKU = ID
-            "URL": ourl,
-            "Opis (PL)": desc_html,
-        }
-
-        # zdjęcia: "Zdjęcie 1", "Zdjęcie 2", ...
-        for i, img in enumerate(images):
-            row[f"Zdjęcie produktu {i+1}"] = img
-
-        # atrybuty jako kolumny (setki kolumn -> OK)
-        for k, v in extra.items():
-            if k not in row:
-                row[k] = v
-
-        rows.append(row)
-
-    df = pd.DataFrame(rows)
-
-    # Ujednolicenie liczby kolumn zdjęć
-    for i in range(1, max_imgs + 1):
-        col = f"Zdjęcie produktu  {i}"
-        if col not in df.columns:
-            df[col] = ""
-
-    # Typy liczbowe
-    for c in ("Cena (Domyślna (PLN))", "Dostępność", "Ilość (Domyślny)"):
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-
-    return df
-
-def _numeric_series(s: pd.Series) -> pd.Series:
-    return pd.to_numeric(s, errors="coerce")
-
-def _is_probably_numeric(s: pd.Series, min_ratio: float = 0.6) -> bool:
-    sn = _numeric_series(s)
-    ratio = sn.notna().mean() if len(s) else 0.0
-    return ratio >= min_ratio
-
-def _auto_advanced_filters(df: pd.DataFrame, excluded_cols: set):
+def read_xml_build_df(url: str, engine: str = "stream", lazy_desc: bool = False) -> pd.DataFrame:
+    # engine="stream" – iterparse po odpowiedzi HTTP (w pamięci jedna oferta naraz),
+    # engine="tree"   – dawny tryb: całe bajty + ET.fromstring (do porównań/benchmarku)
+    # Pod spodem cache na dysku (ETag/Last-Modified) – po restarcie/TTL/„Odśwież” niezmieniony
+    # feed wraca z 304 bez ponownego parsowania.
+    # lazy_desc=True – bez serializacji opisów; opisy czytane na żądanie (description_store)
+    return read_xml_url(url, SHOPER_COLUMNS, engine=engine, lazy_desc=lazy_desc)
+
+@st.cache_data(show_spinner=False, ttl=1800)
+def read_xml_feeds(urls: tuple):
+    # kilka feedów naraz (pula wątków) -> jedna ramka z kolumną „Źródło”, bez duplikatów ID;
+    # błędy jako lista nazw (wyjątki HTTP nie zawsze dają się zapisać w cache)
+    df, n_dupes, errors = read_xml_urls(dict(urls), SHOPER_COLUMNS)
+    return df, n_dupes, list(errors)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def feed_diff(key: str, _df: pd.DataFrame):
+    # porównanie z poprzednim snapshotem źródła (po SKU) – raz na wersję feedu
+    return diff_with_previous(_df, SHOPER_COLUMNS)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def description_store(key: str, _df: pd.DataFrame):
+    # opisy na żądanie z surowego feedu (wczytanego z lazy_desc) – None, gdy opisy są w ramce
+    return open_descriptions(_df, SHOPER_COLUMNS)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def prepare_dataset(key: str, _df: pd.DataFrame) -> PreparedDataset:
+    # _df nie jest hashowany przez Streamlit – kluczem jest dataset_key(df) (źródło + hash treści)
+    return PreparedDataset(_df, key_col=SHOPER_COLUMNS["id"], search_cols=(SHOPER_COLUMNS["name"],))
+
+def _auto_advanced_filters(df: pd.DataFrame, excluded_cols: set, prep: PreparedDataset):
     """
-    Generuje UI i zwraca maskę na podstawie automatycznych filtrów:
+    Generuje UI i zwraca aktywne filtry (spec, etykieta) dla FilterEngine:
     - dla kolumn liczbowych: zakres
     - dla tekstowych/kateg.: multiselect (jeśli liczba unikalnych <= 100)
+    Decyzje (pusta? liczbowa? ile unikalnych?) z profilu kolumn liczonego raz na zbiór.
     """
-    mask = pd.Series(True, index=df.index)
+    filters = []
     enable_adv = st.sidebar.checkbox("🔧 Włącz filtry zaawansowane (XML)", value=False)
     if not enable_adv:
-        return mask
+        return filters
 
+    profiles = prep.column_profiles([c for c in df.columns if c not in excluded_cols])
     with st.sidebar.expander("Filtry zaawansowane (XML – z atrybutów)", expanded=True):
-        for col in [c for c in df.columns if c not in excluded_cols]:
-            series = df[col]
-
-            if not (series.astype(str).str.strip() != "").any():
+        for col, prof in profiles.items():
+            # Pomiń kolumny całkiem puste
+            if not prof.non_empty:
                 continue
 
-            uniques = series.dropna().astype(str).str.strip().unique()
-
-            if _is_probably_numeric(series):
-                sn = _numeric_series(series)
-                if sn.notna().any():
-                    mn, mx = float(sn.min()), float(sn.max())
+            if prof.is_numeric:
+                if prof.bounds is not None:
+                    mn, mx = prof.bounds
                     c1, c2 = st.columns(2)
                     with c1:
                         v_from = st.number_input(f"{col} od", value=mn, step=1.0, format="%.2f", key=f"{col}_from")
                     with c2:
                         v_to = st.number_input(f"{col} do", value=mx, step=1.0, format="%.2f", key=f"{col}_to")
                     if v_from <= v_to:
-                        mask &= sn.between(v_from, v_to, inclusive="both")
+                        filters.append((("range", col, v_from, v_to), f"{col} poza [{v_from}, {v_to}]"))
             else:
-                if len(uniques) == 0:
+                # Tekst/kategoria
+                if prof.n_unique == 0:
                     continue
-                if len(uniques) > 100:
+                if prof.options is None:
+                    # Zbyt dużo (> MAX_OPTIONS) – oferuj pole tekstowe „zawiera”
                     query = st.text_input(f"{col} zawiera", value="", key=f"{col}_contains")
                     if query.strip():
-                        cmp = series.astype(str).str.contains(query.strip(), case=False, na=False)
-                        mask &= cmp
+                        filters.append((("contains", col, query.strip()), f"{col} nie zawiera frazy"))
                 else:
-                    opts = sorted([str(u) for u in uniques], key=str.lower)
-                    sel = st.multiselect(col, options=opts, key=f"{col}_multi")
+                    sel = st.multiselect(col, options=prof.options, key=f"{col}_multi")
                     if sel:
-                        cmp = series.astype(str).str.strip()
-                        mask &= cmp.isin(sel)
+                        filters.append((("in", col, tuple(sel)), f"{col} nie na liście"))
 
-    return mask
+    return filters
 
 # ---------- Wspólne UI (filtry + widok + export) ----------
 def render_app(df: pd.DataFrame, source_label: str, adv_strategy: str = "csv"):
@@ -190,19 +114,21 @@ def render_app(df: pd.DataFrame, source_label: str, adv_strategy: str = "csv"):
         st.error("Plik został wczytany, ale tabela jest pusta.")
         st.stop()
 
-    # wymagane kolumny w tym UI (po rename dla XML)
-    required = ["Nazwa kategorii", "Nazwa producenta", "Nazwa produktu (PL)", "Cena (Domyślna (PLN))", "Dostępność"]
-    missing = [c for c in required if c not in df.columns]
+    missing = missing_columns(df, SHOPER_COLUMNS)
     if missing:
         st.error(f"Brak wymaganych kolumn: {', '.join(missing)}")
         st.stop()
 
     st.success(f"Wczytano: {source_label} • Wiersze: {len(df):,} • Kolumny: {len(df.columns):,}")
 
-    cat_series  = df["Nazwa kategorii"].astype(str).str.strip()
-    prod_series = df["Nazwa producenta"].astype(str).str.strip()
-    name_series = df["Nazwa produktu (PL)"].astype(str)
-    price       = pd.to_numeric(df["Cena (Domyślna (PLN))"], errors="coerce")
+    # znormalizowane kolumny / statystyki – liczone raz na zbiór, nie przy każdym rerunie
+    with stage("prepare", rows=len(df), cols=len(df.columns)):
+        prep = prepare_dataset(dataset_key(df), df)
+    if prep.key_col is not None:
+        dupes = prep.key_index(prep.key_col).duplicates
+        if len(dupes):
+            sample = ", ".join(map(str, dupes.index[:5]))
+            st.sidebar.warning(f"Powtórzone ID: {len(dupes):,} (np. {sample}) – wyszukiwanie po ID bierze pierwsze wystąpienie.")
 
     # --- Filtry podstawowe ---
     st.sidebar.header("Ustawienia filtrowania")
@@ -212,14 +138,14 @@ def render_app(df: pd.DataFrame, source_label: str, adv_strategy: str = "csv"):
         index=1,
     )
 
-    cats_options = sorted(df["Nazwa kategorii"].dropna().astype(str).str.strip().unique().tolist())
+    cats_options = prep.options("Nazwa kategorii")
     selected_cats = st.sidebar.multiselect("Nazwa kategorii", options=cats_options)
 
-    prod_options = sorted(df["Nazwa producenta"].dropna().astype(str).str.strip().unique().tolist())
+    prod_options = prep.options("Nazwa producenta")
     selected_prods = st.sidebar.multiselect("Nazwa producenta", options=prod_options)
 
-    min_price = float(price.min(skipna=True)) if price.notna().any() else 0.0
-    max_price = float(price.max(skipna=True)) if price.notna().any() else 0.0
+    price_bounds = prep.bounds("Cena (Domyślna (PLN))")
+    min_price, max_price = price_bounds if price_bounds is not None else (0.0, 0.0)
     c1, c2 = st.sidebar.columns(2)
     with c1:
         price_from = st.number_input("Cena od", value=min_price, min_value=0.0, step=1.0, format="%.2f")
@@ -229,9 +155,9 @@ def render_app(df: pd.DataFrame, source_label: str, adv_strategy: str = "csv"):
     # Stan liczbowy (jeśli istnieje)
     stan_range = None
     if "Stan" in df.columns:
-        stan_num = pd.to_numeric(df["Stan"], errors="coerce")
-        if stan_num.notna().any():
-            smin, smax = float(stan_num.min()), float(stan_num.max())
+        stan_bounds = prep.bounds("Stan")
+        if stan_bounds is not None:
+            smin, smax = stan_bounds
             c1, c2 = st.sidebar.columns(2)
             with c1:
                 stan_from = st.number_input("Stan od", value=smin, min_value=0.0, step=1.0, format="%.0f")
@@ -243,9 +169,9 @@ def render_app(df: pd.DataFrame, source_label: str, adv_strategy: str = "csv"):
     # Ilość (jeśli istnieje) -> "Ilość (Domyślny)"
     qty_range = None
     if "Ilość (Domyślny)" in df.columns:
-        qty = pd.to_numeric(df["Ilość (Domyślny)"], errors="coerce")
-        if qty.notna().any():
-            qmin, qmax = float(qty.min()), float(qty.max())
+        qty_bounds = prep.bounds("Ilość (Domyślny)")
+        if qty_bounds is not None:
+            qmin, qmax = qty_bounds
             c1, c2 = st.sidebar.columns(2)
             with c1:
                 q_from = st.number_input("Ilość od", value=qmin, min_value=0.0, step=1.0, format="%.0f")
@@ -254,85 +180,57 @@ def render_app(df: pd.DataFrame, source_label: str, adv_strategy: str = "csv"):
             if q_from <= q_to:
                 qty_range = (q_from, q_to)
 
-    name_query = st.sidebar.text_input("Szukaj w 'Nazwa produktu (PL)'", value="")
+    name_query = st.sidebar.text_input("Szukaj w 'Nazwa produktu (PL)'", value="", help="Kilka słów = wszystkie muszą wystąpić (dowolna kolejność).")
 
     # ---------- Filtrowanie podstawowe ----------
-    mask = pd.Series(True, index=df.index)
+    # aktywny filtr = (spec, etykieta powodu odrzucenia); maski per spec cache'uje prep.filters,
+    # więc przy rerunie liczy się tylko filtr, którego widżet się zmienił
+    basic_filters = []
 
-    d = pd.to_numeric(df["Dostępność"], errors="coerce")
     if status_choice in {"Aktywne", "Nieaktywne"}:
         target = 1 if status_choice == "Aktywne" else 99
-        mask &= d == target
+        basic_filters.append((("eq", "Dostępność", target), f"status≠{target}"))
 
+    # Kategoria / Producent – OR gotowych list wierszy z indeksu kategorii
     if selected_cats:
-        mask &= cat_series.isin(selected_cats)
+        basic_filters.append((("in", "Nazwa kategorii", tuple(selected_cats)), "kategoria nie na liście"))
 
     if selected_prods:
-        mask &= prod_series.isin(selected_prods)
+        basic_filters.append((("in", "Nazwa producenta", tuple(selected_prods)), "producent nie na liście"))
 
-    if price.notna().any():
-        mask &= price.between(price_from, price_to, inclusive="both")
+    if price_bounds is not None:
+        basic_filters.append((("range", "Cena (Domyślna (PLN))", price_from, price_to), f"cena poza [{price_from}, {price_to}]"))
 
     if stan_range is not None and "Stan" in df.columns:
-        stan_num_all = pd.to_numeric(df["Stan"], errors="coerce")
-        mask &= stan_num_all.between(stan_range[0], stan_range[1], inclusive="both")
+        basic_filters.append((("range", "Stan", *stan_range), f"stan poza [{stan_range[0]}, {stan_range[1]}]"))
 
     if qty_range is not None and "Ilość (Domyślny)" in df.columns:
-        qty_all = pd.to_numeric(df["Ilość (Domyślny)"], errors="coerce")
-        mask &= qty_all.between(qty_range[0], qty_range[1], inclusive="both")
+        basic_filters.append((("range", "Ilość (Domyślny)", *qty_range), f"ilość poza [{qty_range[0]}, {qty_range[1]}]"))
 
+    # Nazwa – indeks trigramowy; kilka słów = wszystkie muszą wystąpić
     if name_query.strip():
-        mask &= name_series.str.contains(name_query.strip(), case=False, na=False)
+        basic_filters.append((("contains", "Nazwa produktu (PL)", name_query.strip()), "nazwa nie zawiera frazy"))
 
     # --- DIAGNOSTYKA PO ID ---
     check_id = st.sidebar.text_input("Sprawdź ID rekordu", value="")
 
-    def _why_excluded(row: dict) -> list:
-        reasons = []
-
-        # Status
-        d2 = pd.to_numeric(row.get("Dostępność"), errors="coerce")
-        if status_choice == "Aktywne" and d2 != 1:
-            reasons.append("status≠1")
-        if status_choice == "Nieaktywne" and d2 != 99:
-            reasons.append("status≠99")
-
-        # Kategoria / Producent
-        if selected_cats and str(row.get("Nazwa kategorii", "")).strip() not in selected_cats:
-            reasons.append("kategoria nie na liście")
-        if selected_prods and str(row.get("Nazwa producenta", "")).strip() not in selected_prods:
-            reasons.append("producent nie na liście")
-
-        # Cena
-        pr = pd.to_numeric(row.get("Cena (Domyślna (PLN))"), errors="coerce")
-        if price.notna().any() and not (pd.isna(pr) or (price_from <= pr <= price_to)):
-            reasons.append(f"cena poza [{price_from}, {price_to}]")
-
-        # Stan
-        if stan_range is not None and "Stan" in df.columns:
-            stn = pd.to_numeric(row.get("Stan"), errors="coerce")
-            if not (pd.isna(stn) or (stan_range[0] <= stn <= stan_range[1])):
-                reasons.append(f"stan poza [{stan_range[0]}, {stan_range[1]}]")
-
-        # Ilość
-        if qty_range is not None and "Ilość (Domyślny)" in df.columns:
-            qv = pd.to_numeric(row.get("Ilość (Domyślny)"), errors="coerce")
-            if not (pd.isna(qv) or (qty_range[0] <= qv <= qty_range[1])):
-                reasons.append(f"ilość poza [{qty_range[0]}, {qty_range[1]}]")
-
-        # Nazwa
-        if name_query.strip() and name_query.strip().lower() not in str(row.get("Nazwa produktu (PL)", "")).lower():
-            reasons.append("nazwa nie zawiera frazy")
-
-        return reasons
-
-    if check_id.strip():
-        row_df = df[df["ID"].astype(str) == check_id.strip()]
-        if row_df.empty:
+    def _why_excluded(pos: int) -> list:
+        # te same maski co filtr – powód = filtr, którego maska odrzuca wiersz
+        return prep.filters.failed(pos, basic_filters)
+
+    if check_id.strip() and prep.key_col is None:
+        st.sidebar.warning("Brak kolumny ID w danych.")
+    elif check_id.strip():
+        # indeks ID -> pozycja zbudowany raz na zbiór (zamiast porównania całej kolumny)
+        hits = prep.key_index(prep.key_col).rows(check_id.strip())
+        if not len(hits):
             st.sidebar.warning("Brak rekordu o podanym ID w surowych danych.")
         else:
-            r = row_df.iloc[0].to_dict()
-            reasons = _why_excluded(r)
+            if len(hits) > 1:
+                st.sidebar.info(f"ID występuje {len(hits)}× – poniżej pierwsze wystąpienie.")
+            pos = int(hits[0])
+            r = df.iloc[pos].to_dict()
+            reasons = _why_excluded(pos)
             st.sidebar.write(f"ID {check_id}:")
             st.sidebar.write(
                 f"Kategoria={r.get('Nazwa kategorii')} | Producent={r.get('Nazwa producenta')} | "
@@ -346,32 +244,33 @@ def render_app(df: pd.DataFrame, source_label: str, adv_strategy: str = "csv"):
     # ---------- Filtry zaawansowane ----------
     if adv_strategy == "csv":
         # (zostawiamy jak było – dotyczy Twoich CSV kolumn technicznych)
+        adv_filters = []
         ekr_sel = rdzenie_sel = kond_sel = proc_sel = rodz_gpu_sel = rozdz_sel = stan_ob_sel = typ_ram_sel = None
         przek_range = None
         enable_adv = st.sidebar.checkbox("🔧 Włącz filtry zaawansowane (CSV)", value=False)
         if enable_adv:
             with st.sidebar.expander("Filtry zaawansowane (laptopy)", expanded=True):
                 if "ekran_dotykowy" in df.columns:
-                    opts = sorted(df["ekran_dotykowy"].dropna().astype(str).str.strip().unique(), key=str.lower)
+                    opts = prep.options("ekran_dotykowy", key=str.lower)
                     ekr_sel = st.multiselect("Ekran dotykowy", options=opts)
 
                 if "ilosc_rdzeni" in df.columns:
-                    rdz = pd.to_numeric(df["ilosc_rdzeni"], errors="coerce").dropna().astype(int)
+                    rdz = prep.numeric("ilosc_rdzeni").dropna().astype(int)
                     if not rdz.empty:
                         rdzenie_sel = st.multiselect("Liczba rdzeni", options=sorted(rdz.unique().tolist()))
 
                 if "kondycja_sprzetu" in df.columns:
-                    opts = sorted(df["kondycja_sprzetu"].dropna().astype(str).str.strip().unique(), key=str.lower)
+                    opts = prep.options("kondycja_sprzetu", key=str.lower)
                     kond_sel = st.multiselect("Kondycja sprzętu", options=opts)
 
                 if "procesor" in df.columns:
-                    opts = sorted(df["procesor"].dropna().astype(str).str.strip().unique(), key=str.lower)
+                    opts = prep.options("procesor", key=str.lower)
                     proc_sel = st.multiselect("Procesor", options=opts)
 
                 if "przekatna_ekranu" in df.columns:
-                    pe = pd.to_numeric(df["przekatna_ekranu"], errors="coerce")
-                    if pe.notna().any():
-                        pmin, pmax = float(pe.min()), float(pe.max())
+                    pe_bounds = prep.bounds("przekatna_ekranu")
+                    if pe_bounds is not None:
+                        pmin, pmax = pe_bounds
                         c1, c2 = st.columns(2)
                         with c1:
                             p_from = st.number_input("Przekątna od", value=pmin, min_value=0.0, step=0.1, format="%.1f")
@@ -381,19 +280,19 @@ def render_app(df: pd.DataFrame, source_label: str, adv_strategy: str = "csv"):
                             przek_range = (p_from, p_to)
 
                 if "rodzaj_karty_graficznej" in df.columns:
-                    opts = sorted(df["rodzaj_karty_graficznej"].dropna().astype(str).str.strip().unique(), key=str.lower)
+                    opts = prep.options("rodzaj_karty_graficznej", key=str.lower)
                     rodz_gpu_sel = st.multiselect("Rodzaj karty graficznej", options=opts)
 
                 if "rozdzielczosc_ekranu" in df.columns:
-                    opts = sorted(df["rozdzielczosc_ekranu"].dropna().astype(str).str.strip().unique(), key=str.lower)
+                    opts = prep.options("rozdzielczosc_ekranu", key=str.lower)
                     rozdz_sel = st.multiselect("Rozdzielczość ekranu", options=opts)
 
                 if "stan_obudowy" in df.columns:
-                    opts = sorted(df["stan_obudowy"].dropna().astype(str).str.strip().unique(), key=str.lower)
+                    opts = prep.options("stan_obudowy", key=str.lower)
                     stan_ob_sel = st.multiselect("Stan obudowy", options=opts)
 
                 if "typ_pamieci_ram" in df.columns:
-                    opts = sorted(df["typ_pamieci_ram"].dropna().astype(str).str.strip().unique(), key=str.lower)
+                    opts = prep.options("typ_pamieci_ram", key=str.lower)
                     typ_ram_sel = st.multiselect("Typ pamięci RAM", options=opts)
 
             for col, sel in {
@@ -406,17 +305,14 @@ def render_app(df: pd.DataFrame, source_label: str, adv_strategy: str = "csv"):
                 "typ_pamieci_ram": typ_ram_sel,
             }.items():
                 if sel and col in df.columns:
-                    cmp = df[col].astype(str).str.strip().str.casefold()
                     target = pd.Series(sel).astype(str).str.strip().str.casefold().tolist()
-                    mask &= cmp.isin(target)
+                    adv_filters.append((("in_folded", col, tuple(target)), f"{col} nie na liście"))
 
             if "ilosc_rdzeni" in df.columns and rdzenie_sel:
-                r_all = pd.to_numeric(df["ilosc_rdzeni"], errors="coerce").astype("Int64")
-                mask &= r_all.isin(rdzenie_sel)
+                adv_filters.append((("in_int", "ilosc_rdzeni", tuple(rdzenie_sel)), "liczba rdzeni nie na liście"))
 
             if "przekatna_ekranu" in df.columns and przek_range is not None:
-                p_all = pd.to_numeric(df["przekatna_ekranu"], errors="coerce")
-                mask &= p_all.between(przek_range[0], przek_range[1], inclusive="both")
+                adv_filters.append((("range", "przekatna_ekranu", *przek_range), f"przekątna poza [{przek_range[0]}, {przek_range[1]}]"))
 
     elif adv_strategy == "auto":
         # z atrybutów XML: wykluczamy kolumny bazowe + zdjęcia + opis/url itd.
@@ -434,41 +330,167 @@ def render_app(df: pd.DataFrame, source_label: str, adv_strategy: str = "csv"):
             "Opis (PL)",
         }
         excluded.update([c for c in df.columns if str(c).startswith("Zdjęcie produktu ")])
-        mask &= _auto_advanced_filters(df, excluded)
+        with stage("auto_filters"):
+            adv_filters = _auto_advanced_filters(df, excluded, prep)
+    else:
+        adv_filters = []
+
+    active_specs = [spec for spec, _ in basic_filters + adv_filters]
+    with stage("masks", filters=len(active_specs)):
+        mask = prep.filters.combine(active_specs)
+
+    # ---------- Diagnostyka wielu ID ----------
+    with st.expander("🔎 Dlaczego tych ofert nie ma w wyniku? (lista ID)"):
+        ids_text = st.text_area("ID – jedno na linię (albo po przecinku / spacji)", value="", height=120, key="bulk_ids")
+        ids_file = st.file_uploader(
+            "…albo plik z listą ID (CSV/TXT/XLSX – pierwsza kolumna)", type=["csv", "txt", "xlsx", "xls"], key="bulk_ids_file"
+        )
+        ids = ids_text.replace(",", " ").replace(";", " ").split()
+        if ids_file is not None:
+            ids += read_id_list(ids_file)
+        if ids and SHOPER_COLUMNS["id"] not in df.columns:
+            st.warning("Brak kolumny ID w danych.")
+        elif ids:
+            # indeks haszowy ID + gotowe maski filtrów: kolumna na filtr, bez pętli po wierszach
+            report = exclusion_report(prep, SHOPER_COLUMNS["id"], ids, basic_filters + adv_filters)
+            n_missing = int((~report["Znaleziony"]).sum())
+            n_passing = int((report["Powody"] == "").sum())
+            st.write(
+                f"ID: **{len(report):,}** | w wyniku: **{n_passing:,}** | wycięte filtrami: "
+                f"**{len(report) - n_missing - n_passing:,}** | brak w danych: **{n_missing:,}**"
+            )
+            st.dataframe(report, use_container_width=True, height=320)
+            st.download_button("⬇️ CSV – diagnostyka ID", csv_bytes(report), "diagnostyka_id.csv", "text/csv")
 
     # ---------- Widok ----------
-    filtered = df.loc[mask].copy()
-    if filtered.empty:
+    if not mask.any():
         st.warning("Brak wierszy po zastosowaniu filtrów.")
         st.stop()
 
-    non_empty_cols = [
-        c for c in filtered.columns
-        if (filtered[c].notna() & ~filtered[c].astype(str).str.strip().eq("")).any()
-    ]
-    view_df = filtered[non_empty_cols]
+    # kolumny niepuste w wyniku z bitmapy liczonej raz na zbiór; kopiujemy tylko
+    # wybrane wiersze × niepuste kolumny, nie cały przefiltrowany zbiór
+    with stage("non_empty_columns"):
+        non_empty_cols = prep.non_empty_columns(mask)
+    n_rows = int(np.count_nonzero(mask))
 
     st.subheader("Wynik")
-    st.write(f"Wiersze: **{len(view_df):,}** | Kolumny (niepuste): **{len(view_df.columns):,}** / {len(df.columns):,}")
-    st.dataframe(view_df, use_container_width=True, height=560)
+    st.write(f"Wiersze: **{n_rows:,}** | Kolumny (niepuste): **{len(non_empty_cols):,}** / {len(df.columns):,}")
+
+    # siatka stronicowana: sortowanie i cięcie po stronie serwera, do przeglądarki idzie
+    # tylko bieżąca strona; opis HTML i zdjęcia domyślnie ukryte (eksport ma wszystko)
+    heavy_cols = [c for c in non_empty_cols if c == SHOPER_COLUMNS["desc"] or str(c).startswith(SHOPER_COLUMNS["img_prefix"])]
+    g1, g2, g3, g4 = st.columns([2, 1, 1, 1])
+    with g1:
+        sort_col = st.selectbox("Sortuj wg", ["(bez sortowania)"] + non_empty_cols, key="grid_sort")
+    with g2:
+        ascending = st.radio("Kierunek", ["rosnąco", "malejąco"], horizontal=True, key="grid_dir") == "rosnąco"
+    with g3:
+        page_size = st.selectbox("Wierszy na stronę", PAGE_SIZES, index=1, key="grid_page_size")
+    n_pages = page_count(n_rows, page_size)
+    if st.session_state.get("grid_page", 1) > n_pages:
+        st.session_state["grid_page"] = 1
+    with g4:
+        page = int(st.number_input("Strona", min_value=1, max_value=n_pages, value=1, step=1, key="grid_page"))
+    desc_store = description_store(prep.key, df)
+    show_heavy = (bool(heavy_cols) or desc_store is not None) and st.checkbox("Pokaż opis i zdjęcia", value=False, key="grid_heavy")
+    grid_cols = non_empty_cols if show_heavy else [c for c in non_empty_cols if c not in heavy_cols]
+
+    view_key = export_key(prep.key, active_specs, non_empty_cols)
+    rows = np.flatnonzero(mask)
+    if sort_col in non_empty_cols:
+        # kolejność pamiętana dla stanu filtrów + sortowania – zmiana strony jej nie przelicza
+        order_key = (view_key, sort_col, ascending)
+        cached = st.session_state.get("grid_order")
+        if cached is None or cached[0] != order_key:
+            cached = st.session_state["grid_order"] = (order_key, sort_positions(df, rows, sort_col, ascending))
+        rows = cached[1]
+    page_rows = page_slice(rows, page, page_size)
+    page_df = df.iloc[page_rows][grid_cols]
+    if show_heavy and desc_store is not None:
+        page_df = with_descriptions(page_df, page_rows, desc_store, SHOPER_COLUMNS)
+    with stage("grid", rows=len(page_df), cols=len(page_df.columns)):
+        st.dataframe(page_df, use_container_width=True, height=560)
+    st.caption(f"Strona {page} / {n_pages} – wiersze {(page - 1) * page_size + 1:,}–{(page - 1) * page_size + len(page_rows):,} z {n_rows:,}")
 
     st.divider()
     st.subheader("Pobierz wynik")
+    # Pliki powstają dopiero na żądanie i są pamiętane dla danego stanu filtrów –
+    # zmiana filtra nie kosztuje serializacji CSV/XLSX.
+    def _result_frame(rows_mask) -> pd.DataFrame:
+        # wiersze × niepuste kolumny; opisy na żądanie dokładane tylko dla eksportowanych wierszy
+        frame = df.loc[rows_mask, non_empty_cols]
+        if desc_store is not None:
+            frame = with_descriptions(frame, np.flatnonzero(rows_mask), desc_store, SHOPER_COLUMNS)
+        return frame
+
+    exports = exports_for(st.session_state.setdefault("export_files", {}), view_key)
     c1, c2 = st.columns(2)
     with c1:
-        csv_bytes = view_df.to_csv(index=False).encode("utf-8-sig")
-        st.download_button("⬇️ CSV – widok (kolumny niepuste)", csv_bytes, "oferty_widok_niepuste.csv", "text/csv")
+        if "csv" not in exports and st.button("⚙️ Przygotuj CSV", key="prepare_csv"):
+            with st.spinner("Przygotowywanie CSV..."):
+                with stage("export_csv"):
+                    exports["csv"] = csv_bytes(_result_frame(mask))
+        if "csv" in exports:
+            st.download_button("⬇️ CSV – widok (kolumny niepuste)", exports["csv"], "oferty_widok_niepuste.csv", "text/csv")
     with c2:
-        xlsx_bytes = to_excel_bytes(view_df)
-        st.download_button(
-            "⬇️ XLSX – widok (kolumny niepuste)",
-            xlsx_bytes,
-            "oferty_widok_niepuste.xlsx",
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        )
+        if "xlsx" not in exports and st.button("⚙️ Przygotuj XLSX", key="prepare_xlsx"):
+            with st.spinner("Przygotowywanie XLSX..."):
+                with stage("export_xlsx"):
+                    exports["xlsx"] = to_excel_bytes(view_key, _result_frame(mask))
+        if "xlsx" in exports:
+            st.download_button("⬇️ XLSX – widok (kolumny niepuste)", exports["xlsx"], "oferty_widok_niepuste.xlsx", XLSX_MIME)
 
     st.caption("Widok ukrywa kolumny bez wartości w aktualnym wyniku.")
 
+    # ---------- Zmiany od poprzedniego pobrania ----------
+    diff = feed_diff(prep.key, df)
+    if diff is None:
+        return
+    st.divider()
+    st.subheader("Zmiany od poprzedniej wersji feedu")
+    delta_mask = mask & (diff.added | diff.changed)
+    n_added, n_changed = int(np.count_nonzero(mask & diff.added)), int(np.count_nonzero(mask & diff.changed))
+    st.write(
+        f"W wyniku filtrów – nowe: **{n_added:,}** | zmienione: **{n_changed:,}** "
+        f"| zniknęły z feedu: **{len(diff.removed):,}** (cały feed)"
+    )
+    if n_changed:
+        changed_pos = np.flatnonzero(mask & diff.changed)
+        key_col = diff_key(df, SHOPER_COLUMNS)
+        summary = pd.DataFrame({
+            key_col: df[key_col].to_numpy()[changed_pos],
+            SHOPER_COLUMNS["name"]: df[SHOPER_COLUMNS["name"]].to_numpy()[changed_pos],
+            "Zmienione pola": [", ".join(diff.fields[p]) for p in changed_pos],
+        })
+        st.dataframe(summary, use_container_width=True, height=300)
+    if len(diff.removed):
+        # oferty z poprzedniej wersji, których nie ma w feedzie – do wycofania w sklepie
+        if "removed_csv" not in exports and st.button("⚙️ Przygotuj CSV – zniknęły z feedu", key="prepare_removed_csv"):
+            with st.spinner("Przygotowywanie CSV..."):
+                with stage("export_removed_csv"):
+                    exports["removed_csv"] = csv_bytes(diff.removed)
+        if "removed_csv" in exports:
+            st.download_button("⬇️ CSV – zniknęły z feedu", exports["removed_csv"], "oferty_usuniete.csv", "text/csv")
+    if not delta_mask.any():
+        st.caption("Brak nowych i zmienionych ofert w aktualnym wyniku.")
+        return
+    # eksport tylko nowych + zmienionych ofert (z aktualnego wyniku) – zamiast całego katalogu
+    d1, d2 = st.columns(2)
+    with d1:
+        if "delta_csv" not in exports and st.button("⚙️ Przygotuj CSV – tylko zmiany", key="prepare_delta_csv"):
+            with st.spinner("Przygotowywanie CSV..."):
+                with stage("export_delta_csv"):
+                    exports["delta_csv"] = csv_bytes(_result_frame(delta_mask))
+        if "delta_csv" in exports:
+            st.download_button("⬇️ CSV – nowe i zmienione", exports["delta_csv"], "oferty_zmiany.csv", "text/csv")
+    with d2:
+        if "delta_xlsx" not in exports and st.button("⚙️ Przygotuj XLSX – tylko zmiany", key="prepare_delta_xlsx"):
+            with st.spinner("Przygotowywanie XLSX..."):
+                with stage("export_delta_xlsx"):
+                    exports["delta_xlsx"] = xlsx_bytes(_result_frame(delta_mask))
+        if "delta_xlsx" in exports:
+            st.download_button("⬇️ XLSX – nowe i zmienione", exports["delta_xlsx"], "oferty_zmiany.xlsx", XLSX_MIME)
+
 # ---------- Tryb CSV ----------
 def run_csv_mode():
     st.sidebar.subheader("Tryb: CSV/XLSX")
@@ -483,7 +505,7 @@ def run_csv_mode():
         url = f"https://kompre.esolu-hub.pl/api/feed/{slug.strip()}"
         with st.spinner("Pobieranie CSV..."):
             try:
-                df_url = pd.read_csv(url, sep=None, engine="python")
+                df_url = read_csv_url(url)  # warunkowy GET + cache na dysku
                 st.session_state["df_csv"] = df_url
             except Exception:
                 st.sidebar.error("Nie udało się pobrać CSV (zły slug/hasło lub brak pliku).")
@@ -506,53 +528,85 @@ def run_xml_mode():
 
     if st.sidebar.button("🔄 Odśwież XML teraz"):
         read_xml_build_df.clear()
+        read_xml_feeds.clear()
         st.session_state.pop("df_xml", None)
         st.session_state.pop("xml_label", None)
         st.rerun()
 
     source = st.sidebar.radio("Źródło XML", ["GitHub (output)", "Esolu Hub (storage/feeds)"], index=0, horizontal=True)
-
     if source == "GitHub (output)":
-        base_url = "https://marekkomp.github.io/nowe_repo10.2025_allegrocsv_na_XML/output/"
-        key = st.sidebar.text_input("Nazwa pliku XML (bez .xml)", value="", placeholder="np. nazwa_pliku")
-        if st.sidebar.button("Pobierz XML z GitHub"):
-            if not key.strip():
-                st.sidebar.error("Podaj nazwę pliku.")
-                st.stop()
-            xml_url = f"{base_url}{key.strip()}.xml"
-            with st.spinner("Pobieranie i parsowanie XML..."):
-                try:
-                    df_xml = read_xml_build_df(xml_url)
-                    st.session_state["df_xml"] = df_xml
-                    st.session_state["xml_label"] = "URL:XML (GitHub)"
-                except Exception:
-                    st.sidebar.error("Brak dostępu lub plik nie istnieje (zła nazwa pliku).")
-                    st.stop()
+        base_url, where = "https://marekkomp.github.io/nowe_repo10.2025_allegrocsv_na_XML/output/", "GitHub"
     else:
-        base_url2 = "https://kompre.esolu-hub.pl/storage/feeds/"
-        key2 = st.sidebar.text_input("Nazwa pliku (bez .xml)", value="", placeholder="np. nazwa_pliku")
-        if st.sidebar.button("Pobierz XML z Esolu Hub"):
-            if not key2.strip():
-                st.sidebar.error("Podaj nazwę pliku.")
-                st.stop()
-            xml_url2 = f"{base_url2}{key2.strip()}.xml"
-            with st.spinner("Pobieranie i parsowanie XML..."):
+        base_url, where = "https://kompre.esolu-hub.pl/storage/feeds/", "Esolu Hub"
+
+    names_text = st.sidebar.text_area(
+        "Nazwy plików XML (bez .xml) – kilka: jedna na linię", value="", placeholder="np. nazwa_pliku",
+        help=(
+            "Można też podać pełne URL. Kilka feedów pobiera się równolegle i łączy w jeden widok z kolumną „Źródło”. "
+            "Równolegle idzie pobieranie – parsowanie dużych feedów i tak trwa mniej więcej sumę ich czasów "
+            "(chyba że ustawiono SHOPERXML_XML_WORKERS)."
+        ),
+    )
+    names = list(dict.fromkeys(n.strip() for n in names_text.replace(",", "\n").splitlines() if n.strip()))
+    lazy_desc = st.sidebar.checkbox(
+        "Opisy HTML na żądanie", value=False, disabled=len(names) > 1,
+        help="Szybsze wczytywanie dużego feedu: opis jest czytany tylko dla wyświetlanych i eksportowanych wierszy. "
+             "Tylko dla jednego feedu.",
+    )
+    if st.sidebar.button(f"Pobierz XML z {where}"):
+        if not names:
+            st.sidebar.error("Podaj nazwę pliku.")
+            st.stop()
+        urls = {n: n if "://" in n else f"{base_url}{n}.xml" for n in names}
+        with st.spinner("Pobieranie i parsowanie XML..."):
+            if len(urls) == 1:
                 try:
-                    df_xml = read_xml_build_df(xml_url2)
-                    st.session_state["df_xml"] = df_xml
-                    st.session_state["xml_label"] = "URL:XML (Esolu Hub)"
+                    df_xml = read_xml_build_df(urls[names[0]], lazy_desc=lazy_desc)
                 except Exception:
                     st.sidebar.error("Brak dostępu lub plik nie istnieje (zła nazwa pliku).")
                     st.stop()
+                label = f"URL:XML ({where})"
+            else:
+                df_xml, n_dupes, failed = read_xml_feeds(tuple(urls.items()))
+                for name in failed:
+                    st.sidebar.warning(f"{name}: brak dostępu lub plik nie istnieje.")
+                if df_xml is None:
+                    st.sidebar.error("Żaden feed nie został pobrany.")
+                    st.stop()
+                if n_dupes:
+                    st.sidebar.info(f"Pominięto {n_dupes:,} ofert z powtórzonym ID (zostaje pierwsze źródło z listy).")
+                label = f"URL:XML ({where}, feedów: {len(urls) - len(failed)})"
+        st.session_state["df_xml"] = df_xml
+        st.session_state["xml_label"] = label
 
     if "df_xml" in st.session_state:
         render_app(st.session_state["df_xml"], st.session_state.get("xml_label", "URL:XML"), adv_strategy="auto")
     else:
         st.info("Wybierz źródło, podaj nazwę pliku (bez .xml) i pobierz.")
 
+def render_diagnostics():
+    # etapy tego przebiegu: czas i pamięć procesu; etapy z cache nie wykonały się, więc ich nie ma
+    records = run_records()
+    with st.sidebar.expander("🩺 Diagnostyka – ten przebieg", expanded=True):
+        if not records:
+            st.caption("Brak zmierzonych etapów (wszystko z cache).")
+            return
+        table = pd.DataFrame(records).drop(columns=["ts"], errors="ignore")
+        st.dataframe(table, use_container_width=True, hide_index=True)
+        st.caption(
+            f"Suma: {sum(r['seconds'] for r in records):.2f} s. Logi: logger „shoperxml”; "
+            "plik JSONL: zmienna SHOPERXML_METRICS_FILE."
+        )
+
 # ---------- Ekran wyboru ----------
 mode = st.sidebar.radio("Wybierz tryb aplikacji", ["CSV/XLSX", "XML"], index=0, horizontal=True)
-if mode == "CSV/XLSX":
-    run_csv_mode()
-else:
-    run_xml_mode()
+show_diagnostics = st.sidebar.checkbox("🩺 Diagnostyka wydajności", value=False)
+try:
+    if mode == "CSV/XLSX":
+        run_csv_mode()
+    else:
+        run_xml_mode()
+finally:
+    # także po st.stop() w render_app
+    if show_diagnostics:
+        render_diagnostics()
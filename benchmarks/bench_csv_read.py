@@ -0,0 +1,84 @@
+"""Wczytywanie CSV: stary sep=None/engine="python" vs read_csv_source (próbka + szybki parser)
+vs iter_csv_chunks. Czas i szczytowa pamięć (tracemalloc).
+
+    python -m benchmarks.bench_csv_read --mb 50
+    python -m benchmarks.bench_csv_read --mb 500 --skip-legacy
+    python -m benchmarks.bench_csv_read --file eksport_z_api.csv
+"""
+import argparse
+import csv
+import io
+import random
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks.measure import measure
+from shoperxml.tables import iter_csv_chunks, read_csv_source
+
+
+def write_csv(out, target_bytes: int, sep: str = ";", encoding: str = "utf-8-sig", seed: int = 0):
+    """Syntetyczny eksport w stylu CSV API: ~target_bytes bajtów."""
+    rnd = random.Random(seed)
+    text = io.TextIOWrapper(out, encoding=encoding, newline="", write_through=True)
+    w = csv.writer(text, delimiter=sep)
+    w.writerow(["ID", "Nazwa", "Kategoria", "Producent", "Cena", "Dostępność", "Liczba sztuk",
+                "procesor", "ilosc_rdzeni", "przekatna_ekranu", "Opis HTML"])
+    i = 0
+    while out.tell() < target_bytes:
+        w.writerow([
+            i, f"Laptop testowy {i} żółć", f"Kategoria {i % 37}", f"Producent {i % 211}",
+            f"{rnd.randint(100, 9999)}.{rnd.randint(0, 99):02d}", rnd.choice((1, 99)), rnd.randint(0, 50),
+            rnd.choice(("Intel Core i5", "Intel Core i7", "AMD Ryzen 5")), rnd.choice((4, 6, 8, 12)),
+            rnd.choice((13.3, 14, 15.6, 17.3)), f"<p>Opis produktu {i}; " + "lorem ipsum " * rnd.randint(5, 40) + "</p>",
+        ])
+        i += 1
+    text.detach()
+    return i
+
+
+def _legacy(raw: bytes) -> pd.DataFrame:
+    return pd.read_csv(BytesIO(raw), sep=None, engine="python")
+
+
+def _chunked(raw: bytes) -> int:
+    return sum(len(chunk) for chunk in iter_csv_chunks(BytesIO(raw)))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mb", type=float, default=50, help="rozmiar syntetycznego pliku")
+    ap.add_argument("--file", help="zamiast syntetycznego: prawdziwy eksport CSV (np. z esolu-hub)")
+    ap.add_argument("--skip-legacy", action="store_true", help="pomiń silnik python (przy 500 MB trwa bardzo długo)")
+    args = ap.parse_args(argv)
+
+    if args.file:
+        with open(args.file, "rb") as fh:
+            raw = fh.read()
+        print(f"plik: {args.file}, {len(raw) / 1e6:.1f} MB")
+    else:
+        buf = BytesIO()
+        n = write_csv(buf, int(args.mb * 1e6))
+        raw = buf.getvalue()
+        print(f"CSV: {len(raw) / 1e6:.1f} MB, wierszy: {n:,}")
+
+    runs = [("read_csv_source", lambda: read_csv_source(BytesIO(raw))), ("iter_csv_chunks", lambda: _chunked(raw))]
+    if not args.skip_legacy:
+        runs.insert(0, ("python sep=None", lambda: _legacy(raw)))
+    results = {}
+    for label, fn in runs:
+        result, elapsed, peak = measure(fn)
+        results[label] = result
+        rows = result if isinstance(result, int) else len(result)
+        print(f"{label:>16}: {elapsed:7.2f} s | peak {peak / 1e6:8.1f} MB | wierszy {rows:,}")
+
+    if "python sep=None" in results:
+        legacy, fast = results["python sep=None"], results["read_csv_source"]
+        # silnik python zostawia BOM w nazwie pierwszej kolumny ('\ufeffID'), read_csv_source nie
+        legacy_cols = [str(c).lstrip("\ufeff") for c in legacy.columns]
+        assert legacy.shape == fast.shape and legacy_cols == list(fast.columns), "różne ramki"
+        print("kształt i kolumny zgodne")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Zestaw benchmarków: parsowanie, filtrowanie jak w render_app, kolumny niepuste, eksport CSV/XLSX.
+
+Dla każdego rozmiaru feedu (syntetyczny, benchmarks.feedgen) mierzy czas i szczytową pamięć
+(tracemalloc) każdego etapu – w osobnych przebiegach całego potoku, bo tracemalloc zawyża
+czasy (benchmarks.measure); czas to najlepszy z --repeat przebiegów. Wynik w JSON do
+porównywania między commitami:
+
+    python -m benchmarks.bench_suite --sizes 10000,100000 --out wyniki.json
+    python -m benchmarks.bench_suite --sizes 10000,100000 --compare wyniki.json --tolerance 1.25
+
+Przy --compare kod wyjścia 1 oznacza regresję: etap wolniejszy albo z wyższym szczytem pamięci
+niż baseline × tolerance, i to o więcej niż --min-seconds / --min-mb (szum pomiaru).
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from benchmarks.feedgen import write_feed
+from benchmarks.measure import peak_memory, timed
+from shoperxml.export import csv_bytes, xlsx_bytes
+from shoperxml.filters import filters_from_config
+from shoperxml.prepared import PreparedDataset
+from shoperxml.schema import APP_COLUMNS
+from shoperxml.xml_feed import parse_xml_feed
+
+STAGES = ("parse", "filter", "filter_rerun", "non_empty", "export_csv", "export_xlsx")
+PREREQUISITES = {"parse", "filter", "non_empty"}  # pominięte są wykonywane bez pomiaru
+
+# odpowiednik typowego stanu widżetów w render_app
+FILTER_CONFIG = {
+    "status": "Aktywne",
+    "categories": [f"Kategoria {i}" for i in range(0, 37, 3)],
+    "price": [100, 5000],
+    "name": "testowy 1",
+    "columns": {"Atrybut 1": {"range": [5, 30]}},
+}
+
+
+def _recorder(skip: set, out: dict, measure):
+    """record(stage, fn) dla _run_stages: wynik fn, pomiar w out[stage]."""
+    def record(stage, fn):
+        if stage in skip:
+            return fn() if stage in PREREQUISITES else None
+        value, out[stage] = measure(fn)
+        return value
+    return record
+
+
+def _run_stages(path: str, record):
+    """Potok jak w render_app: parsowanie, filtry (pierwszy raz i rerun), kolumny niepuste, eksport."""
+    with open(path, "rb") as src:
+        df = record("parse", lambda: parse_xml_feed(src, APP_COLUMNS))
+    prep = PreparedDataset(df, key_col=APP_COLUMNS["id"])
+    specs = [spec for spec, _ in filters_from_config(FILTER_CONFIG, APP_COLUMNS, prep)]
+    # pierwszy przebieg buduje indeksy i maski, drugi to rerun Streamlit z gotowymi maskami
+    mask = record("filter", lambda: prep.filters.combine(specs))
+    record("filter_rerun", lambda: prep.filters.combine(specs))
+    cols = record("non_empty", lambda: prep.non_empty_columns(mask))
+    view = df.loc[mask, cols]
+    record("export_csv", lambda: csv_bytes(view))
+    record("export_xlsx", lambda: xlsx_bytes(view))
+    return df, mask, cols
+
+
+def run_size(n_offers: int, args, skip: set) -> list:
+    with tempfile.NamedTemporaryFile(suffix=".xml", delete=False) as fh:
+        write_feed(fh, n_offers=n_offers, n_attr_names=args.attrs, n_images=args.images, desc_bytes=args.desc_bytes)
+        path = fh.name
+    seconds, peaks = {}, {}
+    try:
+        feed_mb = os.path.getsize(path) / 1e6
+        # najlepszy z --repeat przebiegów – pojedynczy pomiar bywa zaszumiony o kilkadziesiąt %
+        for _ in range(max(1, args.repeat)):
+            run = {}
+            df, mask, cols = _run_stages(path, _recorder(skip, run, timed))
+            for stage, elapsed in run.items():
+                seconds[stage] = min(elapsed, seconds.get(stage, elapsed))
+        if not args.no_memory:
+            _run_stages(path, _recorder(skip, peaks, peak_memory))
+    finally:
+        os.unlink(path)
+
+    results = [
+        {"offers": n_offers, "stage": "feed", "feed_mb": round(feed_mb, 2), "shape": list(df.shape)},
+        {"offers": n_offers, "stage": "result", "rows": int(mask.sum()), "columns": len(cols)},
+    ]
+    for stage in STAGES:
+        if stage not in seconds:
+            continue
+        entry = {"offers": n_offers, "stage": stage, "seconds": round(seconds[stage], 4)}
+        line = f"{n_offers:>9,} {stage:<13} {seconds[stage]:8.2f} s"
+        if stage in peaks:
+            entry["peak_mb"] = round(peaks[stage] / 1e6, 2)
+            line += f" | peak {peaks[stage] / 1e6:8.1f} MB"
+        results.append(entry)
+        print(line, file=sys.stderr)
+    return results
+
+
+# (klucz w wyniku, jednostka) – porównywane przy --compare
+METRICS = (("seconds", "s"), ("peak_mb", "MB"))
+
+
+def compare(results: list, baseline_path: str, tolerance: float, min_delta: dict) -> list:
+    """Regresje względem baseline: (offers, stage, metryka, baseline, teraz).
+
+    Regresja = wartość > baseline × tolerance i wzrost o więcej niż min_delta[metryka]
+    (bez progu bezwzględnego szum na etapach rzędu milisekund daje fałszywe alarmy).
+    """
+    with open(baseline_path, encoding="utf-8") as fh:
+        baseline = {(r["offers"], r["stage"]): r for r in json.load(fh)["results"]}
+    worse = []
+    for r in results:
+        base = baseline.get((r["offers"], r["stage"]))
+        if not base:
+            continue
+        for metric, _ in METRICS:
+            if metric in r and metric in base:
+                before, now = base[metric], r[metric]
+                if now > before * tolerance and now - before > min_delta[metric]:
+                    worse.append((r["offers"], r["stage"], metric, before, now))
+    return worse
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="10000,100000,1000000", help="liczby ofert, po przecinku")
+    ap.add_argument("--attrs", type=int, default=300, help="liczba różnych nazw atrybutów")
+    ap.add_argument("--images", type=int, default=4, help="zdjęć na ofertę")
+    ap.add_argument("--desc-bytes", type=int, default=1500, help="przybliżony rozmiar opisu HTML")
+    ap.add_argument("--skip", default="", help=f"pomiń etapy (po przecinku): {', '.join(STAGES)}")
+    ap.add_argument("--out", help="plik JSON z wynikami (domyślnie stdout)")
+    ap.add_argument("--compare", help="baseline JSON z poprzedniego uruchomienia")
+    ap.add_argument("--tolerance", type=float, default=1.25)
+    ap.add_argument("--min-seconds", type=float, default=0.1, help="minimalny wzrost czasu uznawany za regresję")
+    ap.add_argument("--min-mb", type=float, default=5.0, help="minimalny wzrost szczytu pamięci uznawany za regresję")
+    ap.add_argument("--repeat", type=int, default=3, help="przebiegi z pomiarem czasu (liczy się najlepszy)")
+    ap.add_argument("--no-memory", action="store_true", help="bez przebiegu z tracemalloc (tylko czasy)")
+    args = ap.parse_args(argv)
+
+    skip = {s.strip() for s in args.skip.split(",") if s.strip()}
+    unknown = skip - set(STAGES)
+    if unknown:
+        ap.error(f"nieznane etapy: {', '.join(sorted(unknown))}")
+
+    results = []
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        results.extend(run_size(size, args, skip))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {"attrs": args.attrs, "images": args.images, "desc_bytes": args.desc_bytes, "repeat": args.repeat},
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        min_delta = {"seconds": args.min_seconds, "peak_mb": args.min_mb}
+        worse = compare(results, args.compare, args.tolerance, min_delta)
+        units = dict(METRICS)
+        for offers, stage, metric, before, now in worse:
+            print(f"REGRESJA {offers:,} {stage}: {before:.2f} {units[metric]} -> {now:.2f} {units[metric]}", file=sys.stderr)
+        return 1 if worse else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
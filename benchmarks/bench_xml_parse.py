@@ -0,0 +1,54 @@
+"""Porównanie silników parsowania XML i sposobów budowania ramki: czas i szczytowa pamięć (tracemalloc).
+
+    python -m benchmarks.bench_xml_parse --offers 50000 --attrs 200
+    python -m benchmarks.bench_xml_parse --offers 500000 --workers 8
+"""
+import argparse
+import os
+from io import BytesIO
+
+import pandas as pd
+
+from benchmarks.feedgen import write_feed
+from benchmarks.measure import measure
+from shoperxml.xml_feed import BUILDERS, ENGINES, parse_xml_feed
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--offers", type=int, default=20_000)
+    ap.add_argument("--attrs", type=int, default=300)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesy dla trybu równoległego")
+    args = ap.parse_args(argv)
+
+    buf = BytesIO()
+    write_feed(buf, n_offers=args.offers, n_attr_names=args.attrs)
+    raw = buf.getvalue()
+    print(f"feed: {len(raw) / 1e6:.1f} MB, ofert: {args.offers:,}, nazw atrybutów: {args.attrs}")
+
+    frames = {}
+    for engine in ENGINES:
+        for build in BUILDERS:
+            df, elapsed, peak = measure(lambda: parse_xml_feed(BytesIO(raw), engine=engine, build=build))
+            frames[(engine, build)] = df
+            print(f"{engine:>8} + {build:<8}: {elapsed:7.2f} s | peak {peak / 1e6:8.1f} MB | {df.shape}")
+    if args.workers > 1:
+        # tracemalloc widzi tylko proces główny – szczyt pamięci procesów potomnych nie jest liczony
+        df, elapsed, peak = measure(lambda: parse_xml_feed(raw, workers=args.workers))
+        frames[("parallel", args.workers)] = df
+        print(f"parallel x{args.workers:<6}: {elapsed:7.2f} s | peak {peak / 1e6:8.1f} MB | {df.shape}")
+
+    reference = frames[("tree", "rows")]
+    for df in frames.values():
+        pd.testing.assert_frame_equal(df, reference)
+    print("wyniki identyczne")
+
+    # atrybuty jako category vs dawne kolumny object – pamięć gotowej ramki
+    wide, elapsed, peak = measure(lambda: parse_xml_feed(BytesIO(raw), compact_attrs=False))
+    print(f"{'object':>19}: {elapsed:7.2f} s | peak {peak / 1e6:8.1f} MB | ramka {wide.memory_usage(deep=True).sum() / 1e6:8.1f} MB")
+    print(f"{'category':>19}: ramka {reference.memory_usage(deep=True).sum() / 1e6:8.1f} MB")
+    pd.testing.assert_frame_equal(reference.astype(wide.dtypes.to_dict()), wide)
+
+
+if __name__ == "__main__":
+    main()
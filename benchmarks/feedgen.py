@@ -0,0 +1,76 @@
+"""Generator syntetycznych feedów XML w formacie oczekiwanym przez shoperxml.xml_feed.
+
+    python -m benchmarks.feedgen --offers 100000 --attrs 400 --images 6 --desc-bytes 2000 feed.xml
+"""
+import argparse
+import random
+from xml.sax.saxutils import escape, quoteattr
+
+_LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Zażółć gęślą jaźń – "
+    "sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. "
+)
+
+
+def _desc(i: int, desc_bytes: int) -> str:
+    html = f"<p>Opis produktu {i}</p>"
+    if desc_bytes > len(html):
+        body = (_LOREM * (desc_bytes // len(_LOREM) + 1))[:desc_bytes - len(html) - 30]
+        html += f"<ul><li>{escape(body)}</li></ul>"
+    return html
+
+
+def _imgs(i: int, n_images: int) -> str:
+    if not n_images:
+        return "<imgs></imgs>"
+    extra = "".join(f'<i url="https://example.com/img/{i}_{k}.jpg"/>' for k in range(2, n_images + 1))
+    return f'<imgs><main url="https://example.com/img/{i}.jpg"/>{extra}</imgs>'
+
+
+def write_feed(
+    out, n_offers: int = 10_000, n_attr_names: int = 50, attrs_per_offer: int = 8, seed: int = 0,
+    n_images: int = 2, desc_bytes: int = 0,
+):
+    """Zapisuje feed do binarnego obiektu plikopodobnego `out`.
+
+    n_images – zdjęć na ofertę (główne + dodatkowe), desc_bytes – przybliżony rozmiar opisu HTML
+    (0 = krótki akapit).
+    """
+    rnd = random.Random(seed)
+    attr_names = [f"Atrybut {i}" for i in range(n_attr_names)]
+    out.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<offers><group name="other">\n')
+    for i in range(n_offers):
+        attrs = "".join(
+            f"<a name={quoteattr(k)}>{escape(str(rnd.randint(1, 40)))}</a>"
+            for k in rnd.sample(attr_names, min(attrs_per_offer, n_attr_names))
+        )
+        out.write(
+            (
+                f'<o id="{i}" url="https://example.com/p/{i}" price="{rnd.randint(1, 9999)},{rnd.randint(0, 99):02d}" '
+                f'avail="{rnd.choice(("1", "99"))}" stock="{rnd.randint(0, 50)}">'
+                f"<cat>Kategoria {i % 37}</cat><name>Produkt testowy {i}</name>"
+                f"<desc>{_desc(i, desc_bytes)}</desc>"
+                f"{_imgs(i, n_images)}"
+                f'<attrs><a name="Producent">Producent {i % 211}</a>{attrs}</attrs>'
+                "</o>\n"
+            ).encode("utf-8")
+        )
+    out.write(b"</group></offers>\n")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Syntetyczny feed XML (format shoperxml.xml_feed).")
+    ap.add_argument("out", help="plik wynikowy .xml")
+    ap.add_argument("--offers", type=int, default=10_000)
+    ap.add_argument("--attrs", type=int, default=50, help="liczba różnych nazw atrybutów")
+    ap.add_argument("--attrs-per-offer", type=int, default=8)
+    ap.add_argument("--images", type=int, default=2, help="zdjęć na ofertę")
+    ap.add_argument("--desc-bytes", type=int, default=0, help="przybliżony rozmiar opisu HTML")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args(argv)
+    with open(args.out, "wb") as fh:
+        write_feed(fh, args.offers, args.attrs, args.attrs_per_offer, args.seed, args.images, args.desc_bytes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Pomiar etapów benchmarków: czas i szczytowa pamięć w osobnych przebiegach.
+
+tracemalloc spowalnia kod intensywny w Pythonie (nawet 2–3×), więc czas mierzymy bez niego,
+a szczyt pamięci w osobnym wywołaniu. tracemalloc widzi tylko proces główny – pamięć
+procesów potomnych (parsowanie równoległe) nie jest liczona.
+"""
+import time
+import tracemalloc
+
+
+def timed(fn):
+    """(wynik fn(), sekundy) – bez tracemalloc."""
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def peak_memory(fn):
+    """(wynik fn(), szczyt zaalokowanych bajtów) – pod tracemalloc."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def measure(fn):
+    """(wynik, sekundy, szczyt bajtów) – fn wywoływane dwa razy, musi dawać ten sam wynik."""
+    result, elapsed = timed(fn)
+    _, peak = peak_memory(fn)
+    return result, elapsed, peak
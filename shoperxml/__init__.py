@@ -0,0 +1 @@
+"""Wspólny silnik (bez Streamlit) dla aplikacji filtrujących oferty z feedów CSV/XLSX/XML."""
@@ -0,0 +1,182 @@
+"""Tryb wsadowy (bez Streamlit) – np. nocny cron: feed -> filtry -> plik do importu.
+
+    python -m shoperxml filter --source URL --config filters.yaml --out wynik.xlsx
+    python -m shoperxml filter --source a.xml --source b.xml --config f.json --out "out/{name}.csv"
+    python -m shoperxml filter --source URL --schema shoper --delta --out zmiany.csv
+
+Źródła: URL albo plik (.xml, .csv, .xlsx/.xls/.xlsm). Filtry: JSON albo YAML (wymaga PyYAML),
+format opisuje shoperxml.filters.filters_from_config. Przy kilku źródłach --out musi zawierać
+{name} (nazwa źródła bez rozszerzenia). --delta zapisuje tylko oferty nowe i zmienione względem
+wersji źródła z ostatniego uruchomienia z --delta tego samego zadania – te same --out, filtry
+i --schema (shoperxml.diff; pierwsze uruchomienie – całość; niezmieniony feed – pusty plik).
+Oferty, które zniknęły ze źródła, trafiają do osobnego pliku <out>-usuniete (ten sam format;
+zapisywany przy każdym --delta z punktem odniesienia, także pusty).
+
+Ciężkie importy (pandas) są dopiero w komendzie, żeby --help i błędy argumentów były natychmiastowe.
+"""
+import argparse
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path, PurePosixPath
+from urllib.parse import urlparse
+
+SCHEMAS = ("app", "shoper")
+
+
+def _load_config(path: str) -> dict:
+    text = Path(path).read_text(encoding="utf-8")
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            raise SystemExit("Konfiguracja YAML wymaga pakietu PyYAML (pip install pyyaml) – albo użyj JSON.")
+        return yaml.safe_load(text) or {}
+    return json.loads(text)
+
+
+def _source_name(source: str) -> str:
+    path = urlparse(source).path if "://" in source else source
+    return PurePosixPath(path.replace("\\", "/")).stem or "feed"
+
+
+def _load_source(source: str, cols: dict, workers=None):
+    from .snapshot import content_hash, load_snapshot, save_snapshot
+    from .tables import read_csv_url, read_table_file
+    from .xml_feed import default_workers, parse_xml_feed, read_xml_url
+
+    is_url = "://" in source
+    is_xml = (urlparse(source).path if is_url else source).lower().endswith(".xml")
+    if is_url:
+        return read_xml_url(source, cols, workers=workers) if is_xml else read_csv_url(source)
+    if is_xml:
+        # lokalny plik też przez snapshoty – potrzebne do --delta (poprzednia wersja pliku)
+        raw = Path(source).read_bytes()
+        key, digest = f"file:{Path(source).resolve()}\0xml:{json.dumps(cols, sort_keys=True)}", content_hash(raw)
+        df = load_snapshot(key, digest)
+        if df is None:
+            df = save_snapshot(parse_xml_feed(raw, cols, workers=default_workers() if workers is None else workers), key, digest)
+        return df
+    with open(source, "rb") as fh:
+        return read_table_file(fh)
+
+
+def _write(frame, out: Path):
+    from .export import write_xlsx
+
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if out.suffix.lower() == ".xlsx":
+        with open(out, "wb") as fh:
+            write_xlsx(frame, fh)
+    elif out.suffix.lower() == ".csv":
+        frame.to_csv(out, index=False, encoding="utf-8-sig")
+    else:
+        raise SystemExit(f"Nieobsługiwany format wyjścia: {out.suffix} (użyj .xlsx albo .csv)")
+
+
+def _delta_baseline(out: Path, config: dict, schema: str) -> str:
+    """Znacznik punktu odniesienia --delta per zadanie (plik wynikowy + filtry + schemat) –
+    dwa crony na tym samym feedzie z innym --config/--out nie przesuwają sobie nawzajem delty."""
+    job = json.dumps([str(out.resolve()), config, schema], sort_keys=True, ensure_ascii=False, default=str)
+    return "cli-delta-" + hashlib.sha1(job.encode("utf-8")).hexdigest()[:12]
+
+
+def _removed_path(out: Path) -> Path:
+    return out.with_name(f"{out.stem}-usuniete{out.suffix}")
+
+
+def _filter_source(source: str, args, cols: dict, config: dict):
+    """Jedno źródło: wczytanie, filtry, (delta), zapis wyniku."""
+    from .diff import diff_with_previous, mark_baseline
+    from .filters import filters_from_config
+    from .prepared import PreparedDataset
+    from .schema import missing_columns
+
+    t0 = time.perf_counter()
+    df = _load_source(source, cols, args.workers)
+    missing = missing_columns(df, cols)
+    if missing:
+        # jak w UI: bez tych kolumn filtry nie mają sensu (i kończyłyby się KeyError)
+        raise ValueError(f"brak wymaganych kolumn ({args.schema}): {', '.join(missing)}")
+    prep = PreparedDataset(df, key_col=cols["id"])
+    dupes = prep.key_index(prep.key_col).duplicates if prep.key_col else ()
+    if len(dupes):
+        print(f"{source}: uwaga – powtórzone ID: {len(dupes):,} (np. {', '.join(map(str, dupes.index[:5]))})", file=sys.stderr)
+    filters = filters_from_config(config, cols, prep)
+    mask = prep.filters.combine([spec for spec, _ in filters])
+    out = Path(args.out.format(name=_source_name(source)))
+    baseline = _delta_baseline(out, config, args.schema) if args.delta else None
+    diff = None
+    if args.delta:
+        diff = diff_with_previous(df, cols, baseline=baseline)
+        if diff is None:
+            print(f"{source}: brak poprzedniego eksportu – zapisuję cały wynik", file=sys.stderr)
+        else:
+            mask &= diff.added | diff.changed
+    # jak w UI: eksport „widoku” – tylko kolumny z wartościami w wyniku; pusty wynik
+    # (np. delta bez zmian) ma wszystkie kolumny, żeby plik miał nagłówek
+    if args.all_columns or not mask.any():
+        result = df.loc[mask]
+    else:
+        result = df.loc[mask, prep.non_empty_columns(mask)]
+    _write(result, out)
+    if diff is not None:
+        # zapisywany zawsze (także pusty) – nie może zostać plik z poprzedniego uruchomienia
+        removed_out = _removed_path(out)
+        _write(diff.removed, removed_out)
+        print(f"{source}: zniknęło ze źródła {len(diff.removed):,} ofert -> {removed_out}", file=sys.stderr)
+    if args.delta:
+        # następne --delta liczy zmiany od tej wersji (także gdy feed się nie zmieni)
+        mark_baseline(df, baseline)
+    print(
+        f"{source}: {len(df):,} wierszy -> {len(result):,} po filtrach -> {out} "
+        f"({time.perf_counter() - t0:.1f} s)",
+        file=sys.stderr,
+    )
+
+
+def cmd_filter(args) -> int:
+    from .schema import APP_COLUMNS, SHOPER_COLUMNS
+
+    cols = SHOPER_COLUMNS if args.schema == "shoper" else APP_COLUMNS
+    config = _load_config(args.config) if args.config else {}
+    if len(args.source) > 1 and "{name}" not in args.out:
+        raise SystemExit("Kilka źródeł: --out musi zawierać {name}.")
+
+    # błąd jednego źródła (np. 404) nie zatrzymuje pozostałych – kod wyjścia 1 na końcu
+    failed = 0
+    for source in args.source:
+        try:
+            _filter_source(source, args, cols, config)
+        except (OSError, ValueError) as e:
+            failed += 1
+            print(f"Błąd: {source}: {e}", file=sys.stderr)
+    if failed:
+        print(f"Nieudane źródła: {failed} z {len(args.source)}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m shoperxml", description="Filtr ofert – tryb wsadowy (bez Streamlit).")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    f = sub.add_parser("filter", help="wczytaj feed, zastosuj filtry, zapisz XLSX/CSV")
+    f.add_argument("--source", action="append", required=True, help="URL albo plik (.xml/.csv/.xlsx); można powtórzyć")
+    f.add_argument("--config", help="filtry: .json albo .yaml (bez – tylko domyślne: status Aktywne)")
+    f.add_argument("--out", required=True, help="plik wynikowy .xlsx/.csv; przy kilku źródłach z {name}")
+    f.add_argument("--schema", choices=SCHEMAS, default="app", help="nazwy kolumn: app (filtr ofert) / shoper (import)")
+    f.add_argument("--all-columns", action="store_true", help="zapisz też kolumny puste w wyniku")
+    f.add_argument("--delta", action="store_true", help="tylko oferty nowe/zmienione od ostatniego uruchomienia z --delta (+ plik usuniętych)")
+    f.add_argument("--workers", type=int, help="procesy parsowania XML (1 = jeden proces; domyślnie SHOPERXML_XML_WORKERS)")
+    f.set_defaults(func=cmd_filter)
+    return ap
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 1
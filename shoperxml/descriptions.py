@@ -0,0 +1,85 @@
+"""Opisy HTML na żądanie – zamiast serializować <desc> każdej oferty przy parsowaniu.
+
+Feed wczytany z lazy_desc=True nie ma kolumny opisu, a jego surowa treść leży obok
+snapshotu (<sha256>.raw). Przy pierwszym użyciu jeden przebieg regexem po pliku (mmap)
+zapisuje pozycje bajtów elementu <desc> każdej oferty; opis konkretnego wiersza to
+parsowanie tylko tego wycinka – dla wierszy bieżącej strony albo eksportu.
+"""
+import mmap
+import re
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+from .snapshot import raw_path
+from .xml_feed import OFFER_START, desc_html
+
+_DESC_START = re.compile(rb"<desc[\s>/]")
+
+
+def scan_desc_offsets(raw) -> np.ndarray:
+    """(liczba ofert, 2): początek i koniec elementu <desc> w bajtach, -1 gdy oferta nie ma opisu."""
+    offsets = []
+    for m in OFFER_START.finditer(raw):
+        tag_end = raw.find(b">", m.start()) + 1
+        if tag_end == 0 or raw[tag_end - 2:tag_end] == b"/>":
+            offsets.append((-1, -1))  # <o …/> – bez opisu; </o> dalej należy do następnej oferty
+            continue
+        end = raw.find(b"</o>", tag_end)
+        d = _DESC_START.search(raw, tag_end, end if end >= 0 else len(raw))
+        if d is None:
+            offsets.append((-1, -1))
+        elif raw[d.end() - 1:d.end()] == b"/":
+            offsets.append((d.start(), raw.find(b">", d.end()) + 1))  # <desc/>
+        else:
+            offsets.append((d.start(), raw.find(b"</desc>", d.end()) + len(b"</desc>")))
+    return np.asarray(offsets, dtype=np.int64).reshape(-1, 2)
+
+
+class DescriptionStore:
+    """Opisy wierszy ramki z surowego feedu (pozycja wiersza = kolejność <o> w pliku)."""
+
+    def __init__(self, path):
+        with open(path, "rb") as fh:
+            self._raw = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        head = self._raw[:256]
+        self._decl = head[:head.index(b"?>") + 2] if head.startswith(b"<?xml") else b""
+        self.offsets = scan_desc_offsets(self._raw)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _one(self, pos: int) -> str:
+        start, end = self.offsets[pos]
+        if start < 0:
+            return ""
+        return desc_html(ET.fromstring(self._decl + self._raw[start:end]))
+
+    def get(self, positions) -> list:
+        return [self._one(int(p)) for p in positions]
+
+
+def open_descriptions(df: pd.DataFrame, cols: dict):
+    """DescriptionStore dla ramki wczytanej z lazy_desc=True albo None (opisy są w ramce)."""
+    source, digest = df.attrs.get("source"), df.attrs.get("content_hash")
+    if cols["desc"] in df.columns or not (source and digest):
+        return None
+    path = raw_path(source, digest)
+    if not path.exists():
+        return None
+    store = DescriptionStore(path)
+    # liczba <o> w pliku musi się zgadzać z liczbą wierszy – inaczej pozycje nie pasują
+    return store if len(store) == len(df) else None
+
+
+def with_descriptions(frame: pd.DataFrame, positions, store: DescriptionStore, cols: dict) -> pd.DataFrame:
+    """frame (wiersze `positions` ramki) z dołożoną kolumną opisu – za URL, jak przy pełnym
+    parsowaniu. Kolumna pusta we wszystkich wierszach nie jest dokładana."""
+    values = store.get(positions)
+    if not any(values):
+        return frame
+    frame = frame.copy()
+    at = frame.columns.get_loc(cols["url"]) + 1 if cols["url"] in frame.columns else len(frame.columns)
+    frame.insert(at, cols["desc"], values)
+    return frame
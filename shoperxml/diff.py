@@ -0,0 +1,107 @@
+"""Różnice między bieżącym parsowaniem a poprzednim snapshotem tego samego źródła.
+
+Oferty są parowane po kluczu (SKU, a bez niego ID). Dla każdej oferty liczony jest hash
+porównywanych pól (cena, stan magazynowy, dostępność, opis) – pełne porównanie pól
+robimy tylko dla ofert z innym hashem, żeby wskazać, co się zmieniło.
+
+Punkt odniesienia: poprzednia wersja źródła (inna treść) albo – z `baseline` – wersja
+oznaczona przy ostatnim eksporcie (mark_baseline). Drugie dopiero pozwala eksportować
+przyrostowo: niezmieniony feed daje pustą deltę zamiast ponownie tej samej.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .snapshot import load_marked_snapshot, load_previous_snapshot, mark_snapshot
+
+# added/changed – maski wierszy bieżącej ramki; fields – pozycja wiersza -> lista zmienionych
+# kolumn (tylko zmienione); removed – oferty z poprzedniego snapshotu, których już nie ma
+FeedDiff = namedtuple("FeedDiff", "added changed fields removed")
+
+
+def diff_key(df: pd.DataFrame, cols: dict) -> str:
+    sku = cols.get("sku")
+    return sku if sku and sku in df.columns else cols["id"]
+
+
+def diff_fields(cols: dict) -> list:
+    return [cols["price"], cols["stock"], cols["avail"], cols["desc"]]
+
+
+def _as_text(s: pd.Series) -> pd.Series:
+    return s.astype(object).where(s.notna(), "").astype(str).str.strip()
+
+
+def _normalized(df: pd.DataFrame, fields) -> pd.DataFrame:
+    return pd.DataFrame(
+        {c: _as_text(df[c]) if c in df.columns else pd.Series("", index=df.index) for c in fields},
+        index=df.index,
+    )
+
+
+def _keys(df: pd.DataFrame, key_col: str):
+    """(klucze jako tekst, maska wierszy z pierwszym wystąpieniem niepustego klucza)."""
+    if key_col not in df.columns:
+        raise ValueError(f"Brak kolumny klucza {key_col!r}")
+    keys = _as_text(df[key_col])
+    first = (keys != "") & ~keys.duplicated()
+    return keys.to_numpy(dtype=object), first.to_numpy()
+
+
+def diff_frames(current: pd.DataFrame, previous: pd.DataFrame, key_col: str, fields) -> FeedDiff:
+    cur_keys, cur_first = _keys(current, key_col)
+    prev_keys, prev_first = _keys(previous, key_col)
+    prev_rows = np.flatnonzero(prev_first)
+
+    # pozycja oferty w poprzednim snapshocie (-1: nowa); duplikaty klucza pomijamy
+    lookup = pd.Index(prev_keys[prev_rows]).get_indexer(cur_keys)
+    added = cur_first & (lookup < 0)
+    matched = np.flatnonzero(cur_first & (lookup >= 0))
+    matched_prev = prev_rows[lookup[matched]]
+
+    cur_norm = _normalized(current, fields)
+    prev_norm = _normalized(previous, fields)
+    cur_hash = pd.util.hash_pandas_object(cur_norm, index=False).to_numpy()
+    prev_hash = pd.util.hash_pandas_object(prev_norm, index=False).to_numpy()
+    differs = cur_hash[matched] != prev_hash[matched_prev]
+    cur_pos, prev_pos = matched[differs], matched_prev[differs]
+
+    changed = np.zeros(len(current), dtype=bool)
+    changed[cur_pos] = True
+    per_field = {
+        c: cur_norm[c].to_numpy()[cur_pos] != prev_norm[c].to_numpy()[prev_pos]
+        for c in fields
+    }
+    field_lists = [[c for c in fields if per_field[c][i]] for i in range(len(cur_pos))]
+    changed_fields = pd.Series(field_lists, index=cur_pos, dtype=object)
+
+    in_current = pd.Index(cur_keys[cur_first]).get_indexer(prev_keys) >= 0
+    return FeedDiff(added, changed, changed_fields, previous.loc[prev_first & ~in_current])
+
+
+def diff_with_previous(df: pd.DataFrame, cols: dict, baseline: str = None):
+    """Różnice względem poprzedniego snapshotu źródła df albo None (brak historii).
+
+    baseline – nazwa znacznika (mark_baseline): porównanie z wersją z ostatniego eksportu,
+    także gdy to ta sama treść (wtedy delta jest pusta).
+    """
+    source, digest = df.attrs.get("source"), df.attrs.get("content_hash")
+    if not (source and digest):
+        return None
+    if baseline:
+        previous = load_marked_snapshot(source, baseline)
+    else:
+        previous = load_previous_snapshot(source, digest)
+    if previous is None:
+        return None
+    return diff_frames(df, previous, diff_key(df, cols), diff_fields(cols))
+
+
+def mark_baseline(df: pd.DataFrame, baseline: str) -> bool:
+    """Oznacza wersję df jako punkt odniesienia `baseline` dla kolejnych diff_with_previous."""
+    source, digest = df.attrs.get("source"), df.attrs.get("content_hash")
+    if not (source and digest):
+        return False
+    mark_snapshot(source, digest, baseline)
+    return True
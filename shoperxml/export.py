@@ -0,0 +1,61 @@
+"""Eksport wyniku do XLSX/CSV.
+
+XLSX przez openpyxl w trybie write-only: wiersze lecą do arkusza porcjami (chunk_rows),
+bez budowania modelu całego skoroszytu w pamięci, a plik powstaje w SpooledTemporaryFile
+(duży wynik ląduje na dysku, nie w RAM). Cache w aplikacji jest kluczowany export_key(...)
+(wersja zbioru + stan filtrów), zamiast hashowania całej ramki przez st.cache_data.
+"""
+import hashlib
+import tempfile
+
+import pandas as pd
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CHUNK_ROWS = 5_000
+SPOOL_MAX_BYTES = 32 * 1024 * 1024
+EXPORTS_KEPT = 3         # ile ostatnich widoków trzyma gotowe pliki w sesji
+
+
+def export_key(dataset_key: str, specs, columns) -> str:
+    """Klucz eksportu: ten sam zbiór + te same filtry + te same kolumny = ten sam plik."""
+    state = repr((dataset_key, list(specs), [str(c) for c in columns]))
+    return hashlib.sha256(state.encode("utf-8")).hexdigest()
+
+
+def exports_for(store: dict, key: str, keep: int = EXPORTS_KEPT) -> dict:
+    """Gotowe pliki eksportu widoku `key` w `store` (np. st.session_state) – dla `keep` ostatnich
+    widoków, więc powrót do wcześniejszego stanu filtrów (A -> B -> A) nie liczy ich od nowa."""
+    entry = store.pop(key, None) or {}
+    store[key] = entry  # kolejność wstawiania = kolejność użycia; najstarsze na początku
+    while len(store) > keep:
+        store.pop(next(iter(store)))
+    return entry
+
+
+def _cells(s: pd.Series) -> list:
+    # braki -> puste komórki; typy numpy -> typy Pythona (openpyxl)
+    return s.astype(object).where(s.notna(), None).tolist()
+
+
+def write_xlsx(df: pd.DataFrame, fileobj, sheet_name: str = "dane", chunk_rows: int = CHUNK_ROWS):
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    ws.append([str(c) for c in df.columns])
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows]
+        for row in zip(*(_cells(chunk[c]) for c in chunk.columns)):
+            ws.append(row)
+    wb.save(fileobj)
+
+
+def xlsx_bytes(df: pd.DataFrame, sheet_name: str = "dane") -> bytes:
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as tmp:
+        write_xlsx(df, tmp, sheet_name=sheet_name)
+        tmp.seek(0)
+        return tmp.read()
+
+
+def csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode("utf-8-sig")
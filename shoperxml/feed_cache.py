@@ -0,0 +1,106 @@
+"""Trwały (na dysku) cache feedów pobieranych z URL.
+
+Dla każdego URL (i sposobu parsowania) trzymamy <klucz>.json z walidatorami odpowiedzi
+(ETag, Last-Modified) i hashem treści; sparsowana ramka leży w magazynie snapshotów
+(shoperxml.snapshot, Parquet).
+
+Kolejne pobranie to warunkowy GET (If-None-Match / If-Modified-Since); na 304 zwracamy
+snapshot bez pobierania i parsowania feedu. Przetrwa restart serwera i TTL st.cache_data.
+Samo pobieranie (sesja z pulą połączeń, gzip, timeouty, powtórzenia) – shoperxml.fetch.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from .fetch import open_url
+from .metrics import stage
+from .snapshot import HashingReader, cache_dir, load_snapshot, raw_path, save_snapshot, store_raw
+
+
+def _meta_path(source: str) -> Path:
+    key = hashlib.sha256(source.encode("utf-8")).hexdigest()[:32]
+    return cache_dir() / f"{key}.json"
+
+
+def _load_meta(meta_path: Path):
+    if not meta_path.exists():
+        return None
+    try:
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path: Path, meta: dict):
+    # unikalny plik tymczasowy – ten sam URL może zapisywać kilka sesji naraz
+    fd, tmp_name = tempfile.mkstemp(dir=meta_path.parent, suffix=".json.tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps(meta))
+        os.replace(tmp_name, meta_path)
+    finally:
+        Path(tmp_name).unlink(missing_ok=True)
+
+
+def fetch_parsed(url: str, parse, parser_tag: str, keep_raw: bool = False) -> pd.DataFrame:
+    """Pobiera `url` warunkowo i zwraca parse(odpowiedź) albo snapshot z dysku (304).
+
+    parser_tag rozróżnia różne sposoby parsowania tego samego URL (np. schemat kolumn).
+    keep_raw – surowa treść zostaje na dysku obok snapshotu (snapshot.raw_path).
+    """
+    source = f"{url}\0{parser_tag}"
+    meta_path = _meta_path(source)
+    meta = _load_meta(meta_path)
+
+    headers = {}
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    with stage("fetch", url=url, conditional=bool(headers)) as rec:
+        resp = open_url(url, headers=headers)
+        rec["status"] = resp.status_code
+    if resp.status_code == 304:
+        resp.close()
+        if not meta:
+            raise OSError(f"{url}: 304 Not Modified bez zapytania warunkowego")
+        digest = meta.get("content_hash", "")
+        with stage("snapshot_load", url=url):
+            df = load_snapshot(source, digest)
+        if df is not None and (not keep_raw or raw_path(source, digest).exists()):
+            return df
+        # brak/uszkodzony snapshot – pobierz od nowa bez walidatorów
+        meta_path.unlink(missing_ok=True)
+        return fetch_parsed(url, parse, parser_tag, keep_raw)
+
+    tee = tempfile.NamedTemporaryFile(dir=cache_dir(), suffix=".raw.tmp", delete=False) if keep_raw else None
+    try:
+        with resp, stage("download_parse", url=url, parser=parser_tag.split(":", 1)[0]) as rec:
+            # pobieranie i parsowanie idą razem (parser czyta strumień odpowiedzi kawałkami);
+            # resp.raw oddaje treść już po gzip/deflate, więc hash liczy się z samego feedu
+            reader = HashingReader(resp.raw, tee=tee)
+            df = parse(reader)
+            rec["bytes"], rec["rows"] = reader.n_bytes, len(df)
+            rec["encoding"] = resp.headers.get("Content-Encoding", "identity")
+            etag = resp.headers.get("ETag")
+            last_modified = resp.headers.get("Last-Modified")
+        digest = reader.hexdigest()
+        if tee is not None:
+            tee.close()
+            store_raw(source, digest, Path(tee.name))
+    finally:
+        if tee is not None:
+            tee.close()
+            Path(tee.name).unlink(missing_ok=True)
+
+    with stage("snapshot_save", url=url):
+        df = save_snapshot(df, source, digest)
+    if etag or last_modified:
+        _write_meta(meta_path, {"url": url, "etag": etag, "last_modified": last_modified, "content_hash": digest})
+    return df
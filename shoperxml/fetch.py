@@ -0,0 +1,65 @@
+"""Wspólna warstwa HTTP dla feedów (GitHub Pages, esolu-hub): jedna sesja requests na proces.
+
+- pula połączeń keep-alive (kolejne feedy z tego samego hosta nie otwierają nowego połączenia),
+- Accept-Encoding: gzip, deflate – treść dekodowana w locie (resp.raw, decode_content=True),
+- ciało odpowiedzi czytane strumieniowo, kawałkami, prosto do parsera,
+- timeout połączenia/odczytu i ograniczona liczba powtórzeń (błędy połączenia, 429/5xx).
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+CONNECT_TIMEOUT = 10      # s
+READ_TIMEOUT = 120        # s – między kolejnymi kawałkami odpowiedzi, nie na całość
+RETRIES = 3
+BACKOFF = 0.5             # 0.5 s, 1 s, 2 s
+POOL_SIZE = 16            # połączeń na host (>= multi_feed.MAX_WORKERS)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _new_session() -> requests.Session:
+    retry = Retry(
+        total=RETRIES,
+        backoff_factor=BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,  # ostatnia odpowiedź 5xx wraca do raise_for_status
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=POOL_SIZE)
+    s = requests.Session()
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    s.headers.update({"Accept-Encoding": "gzip, deflate", "User-Agent": "shoperxml"})
+    return s
+
+
+def session() -> requests.Session:
+    """Sesja współdzielona przez wszystkie pobrania w procesie (także wątki multi_feed)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _new_session()
+    return _session
+
+
+def open_url(url: str, headers: dict = None) -> requests.Response:
+    """GET ze strumieniowaniem; 304 wraca jako odpowiedź, inne błędy HTTP -> requests.HTTPError.
+
+    Treść czyta się z resp.raw (obiekt plikopodobny, już zdekodowany z gzip/deflate).
+    Odpowiedź trzeba zamknąć (with resp: …) – połączenie wraca wtedy do puli.
+    """
+    resp = session().get(url, headers=headers or {}, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    if resp.status_code != 304:
+        try:
+            resp.raise_for_status()
+        except requests.HTTPError:
+            resp.close()
+            raise
+    resp.raw.decode_content = True
+    return resp
@@ -0,0 +1,163 @@
+"""Silnik filtrów: maska per filtr liczona raz dla danych parametrów.
+
+Filtr opisuje krotka (spec) – rodzaj, kolumna, parametry:
+
+    ("eq", col, value)             – numeric(col) == value (np. status 1/99)
+    ("in", col, (v1, v2, ...))     – text(col) na liście (indeks kategorii)
+    ("in_folded", col, (v1, ...))  – j.w. bez rozróżniania wielkości liter
+    ("in_int", col, (1, 2, ...))   – numeric(col) jako Int64 na liście
+    ("range", col, lo, hi)         – lo <= numeric(col) <= hi (braki odpadają)
+    ("contains", col, query)       – wszystkie słowa z query w text(col) (indeks trigramowy)
+
+Maski (np.ndarray bool) są cache'owane po spec – przy rerunie Streamlit przelicza się tylko
+filtr, którego widżet się zmienił, a reszta to AND gotowych tablic.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+MAX_CACHED_MASKS = 256
+
+
+class FilterEngine:
+    def __init__(self, prep, max_cached: int = MAX_CACHED_MASKS):
+        self.prep = prep
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()  # silnik jest współdzielony między sesjami (st.cache_resource)
+
+    def _compute(self, spec) -> np.ndarray:
+        kind, col = spec[0], spec[1]
+        prep = self.prep
+        if kind == "eq":
+            return (prep.numeric(col) == spec[2]).to_numpy()
+        if kind == "in":
+            return prep.category_index(col).mask(spec[2])
+        if kind == "in_folded":
+            return prep.category_index(col, casefold=True).mask(spec[2])
+        if kind == "in_int":
+            return prep.numeric(col).astype("Int64").isin(spec[2]).to_numpy(dtype=bool, na_value=False)
+        if kind == "range":
+            return prep.numeric(col).between(spec[2], spec[3], inclusive="both").to_numpy()
+        if kind == "contains":
+            return prep.search_index(col).mask(spec[2])
+        raise ValueError(f"Nieznany rodzaj filtra: {kind!r}")
+
+    def mask_for(self, spec) -> np.ndarray:
+        with self._lock:
+            m = self._cache.get(spec)
+            if m is not None:
+                self._cache.move_to_end(spec)
+                return m
+        m = self._compute(spec)
+        with self._lock:
+            self._cache[spec] = m
+            if len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        return m
+
+    def combine(self, specs) -> np.ndarray:
+        """AND masek wszystkich filtrów (pusta lista = wszystkie wiersze)."""
+        out = np.ones(len(self.prep.df), dtype=bool)
+        for spec in specs:
+            np.logical_and(out, self.mask_for(spec), out=out)
+        return out
+
+    def failed(self, pos: int, filters) -> list:
+        """Etykiety filtrów (z par (spec, etykieta)), które odrzucają wiersz na pozycji pos."""
+        return [label for spec, label in filters if not self.mask_for(spec)[pos]]
+
+    def rejections(self, positions: np.ndarray, filters) -> dict:
+        """{etykieta: maska odrzuceń} dla wierszy `positions` – z tych samych masek co filtr."""
+        return {label: ~self.mask_for(spec)[positions] for spec, label in filters}
+
+
+NOT_FOUND = "brak w danych"
+
+
+def exclusion_report(prep, key_col: str, keys, filters) -> pd.DataFrame:
+    """Diagnostyka wielu kluczy naraz: wiersz na klucz, kolumna na filtr (True = odrzuca)
+    i „Powody” – etykiety filtrów, które wycięły ofertę (albo NOT_FOUND)."""
+    keys = list(dict.fromkeys(str(k).strip() for k in keys if str(k).strip()))
+    pos = prep.key_index(key_col).positions(keys)
+    found = pos >= 0
+    table = {key_col: keys, "Znaleziony": found}
+    for label, rejected in prep.filters.rejections(pos[found], filters).items():
+        column = np.zeros(len(keys), dtype=bool)
+        column[found] = rejected
+        table[label] = column
+    report = pd.DataFrame(table)
+    labels = list(table)[2:]
+    flags = report[labels].to_numpy()
+    report["Powody"] = [
+        ", ".join(label for label, hit in zip(labels, row) if hit) if ok else NOT_FOUND
+        for ok, row in zip(found, flags)
+    ]
+    return report
+
+
+STATUS_VALUES = {"Aktywne": 1, "Nieaktywne": 99}
+
+
+def _pair(value, what: str):
+    if not (isinstance(value, (list, tuple)) and len(value) == 2):
+        raise ValueError(f"{what}: oczekiwano [od, do], jest {value!r}")
+    return float(value[0]), float(value[1])
+
+
+def filters_from_config(config: dict, cols: dict, prep) -> list:
+    """Filtry (spec, etykieta) z konfiguracji trybu wsadowego – ta sama semantyka co w UI.
+
+    Klucze (wszystkie opcjonalne):
+        status: Aktywne | Nieaktywne | Wszystkie   (domyślnie Aktywne, jak w UI)
+        categories: [...]        producers: [...]
+        price: [od, do]          (domyślnie pełny zakres – jak widżet w UI)
+        stan: [od, do]           qty: [od, do]
+        name: "fraza"
+        columns: {kolumna: {in: [...]} | {in_folded: [...]} | {range: [od, do]} | {contains: "..."}}
+    """
+    filters = []
+    df = prep.df
+
+    status = config.get("status", "Aktywne")
+    if status in STATUS_VALUES:
+        target = STATUS_VALUES[status]
+        filters.append((("eq", cols["avail"], target), f"status≠{target}"))
+    elif status != "Wszystkie":
+        raise ValueError(f"status: nieznana wartość {status!r}")
+
+    if config.get("categories"):
+        filters.append((("in", cols["cat"], tuple(map(str, config["categories"]))), "kategoria nie na liście"))
+    if config.get("producers"):
+        filters.append((("in", cols["producer"], tuple(map(str, config["producers"]))), "producent nie na liście"))
+
+    price_range = _pair(config["price"], "price") if "price" in config else prep.bounds(cols["price"])
+    if price_range is not None and prep.bounds(cols["price"]) is not None:
+        filters.append((("range", cols["price"], *price_range), f"cena poza [{price_range[0]}, {price_range[1]}]"))
+
+    for key, col, label in (("stan", cols["stan"], "stan"), ("qty", cols["stock"], "ilość")):
+        if key in config and col in df.columns:
+            lo, hi = _pair(config[key], key)
+            filters.append((("range", col, lo, hi), f"{label} poza [{lo}, {hi}]"))
+
+    if str(config.get("name") or "").strip():
+        filters.append((("contains", cols["name"], str(config["name"]).strip()), "nazwa nie zawiera frazy"))
+
+    for col, rule in (config.get("columns") or {}).items():
+        if col not in df.columns:
+            raise ValueError(f"columns: brak kolumny {col!r} w danych")
+        if "in" in rule:
+            filters.append((("in", col, tuple(map(str, rule["in"]))), f"{col} nie na liście"))
+        elif "in_folded" in rule:
+            values = tuple(str(v).strip().casefold() for v in rule["in_folded"])
+            filters.append((("in_folded", col, values), f"{col} nie na liście"))
+        elif "range" in rule:
+            lo, hi = _pair(rule["range"], col)
+            filters.append((("range", col, lo, hi), f"{col} poza [{lo}, {hi}]"))
+        elif "contains" in rule:
+            filters.append((("contains", col, str(rule["contains"]).strip()), f"{col} nie zawiera frazy"))
+        else:
+            raise ValueError(f"columns.{col}: oczekiwano in / in_folded / range / contains")
+    return filters
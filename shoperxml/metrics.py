@@ -0,0 +1,106 @@
+"""Pomiary etapów: czas i pamięć procesu (RSS) wokół gorących ścieżek.
+
+    with stage("parse", url=url):
+        df = ...
+
+Każdy etap:
+- trafia do listy bieżącego przebiegu (wątku) – panel „Diagnostyka” w aplikacji (run_records),
+- jest logowany jako JSON przez logging.getLogger("shoperxml") na poziomie INFO,
+- jeśli ustawiono SHOPERXML_METRICS_FILE – dopisywany jako linia JSON do tego pliku.
+
+SHOPERXML_LOG_LEVEL (np. INFO) dokłada handler na stderr, gdy logging nie jest skonfigurowany.
+
+Streamlit wykonuje każdy rerun sesji w jednym wątku, więc lista jest per wątek i czyszczona
+na początku skryptu (start_run). Etap, który nie wykonał się (np. wynik z cache), nie pojawia się.
+Wątki robocze (pule wątków) dopisują się do listy wywołującego przez run_in(current_run(), …).
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("shoperxml")
+if os.environ.get("SHOPERXML_LOG_LEVEL") and not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(os.environ["SHOPERXML_LOG_LEVEL"].upper())
+
+_local = threading.local()
+_file_lock = threading.Lock()
+
+
+def rss_mb():
+    """Bieżąca pamięć procesu (RSS) w MB; None, gdy system jej nie udostępnia."""
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # brak /proc (np. macOS): szczytowe RSS zamiast bieżącego; ru_maxrss na macOS w bajtach,
+    # na pozostałych systemach w KB
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1e6 if sys.platform == "darwin" else max_rss / 1e3
+
+
+def start_run():
+    """Nowy przebieg (rerun) – czyści listę etapów bieżącego wątku."""
+    _local.records = []
+
+
+def run_records() -> list:
+    """Etapy zmierzone w bieżącym przebiegu."""
+    return list(getattr(_local, "records", ()))
+
+
+def current_run():
+    """Lista etapów przebiegu bieżącego wątku (None poza przebiegiem) – do przekazania do run_in."""
+    return getattr(_local, "records", None)
+
+
+def run_in(records, fn, *args, **kwargs):
+    """fn(*args, **kwargs) w wątku roboczym – jego etapy trafiają do listy przebiegu `records`."""
+    previous = getattr(_local, "records", None)
+    _local.records = records
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _local.records = previous
+
+
+def _emit(record: dict):
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    logger.info(line)
+    path = os.environ.get("SHOPERXML_METRICS_FILE")
+    if path:
+        with _file_lock, open(path, "a", encoding="utf-8") as fh:
+            fh.write(line + "\n")
+
+
+@contextmanager
+def stage(name: str, **fields):
+    """Mierzy blok: czas (s), RSS po etapie i przyrost RSS (MB); fields – dodatkowe pola rekordu.
+
+    Do pól można dopisać wartości w trakcie: `with stage("x") as rec: rec["rows"] = n`.
+    """
+    record = {"stage": name, **fields}
+    rss_before = rss_mb()
+    t0 = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = round(time.perf_counter() - t0, 4)
+        rss_after = rss_mb()
+        if rss_after is not None:
+            record["rss_mb"] = round(rss_after, 1)
+            record["rss_delta_mb"] = round(rss_after - rss_before, 1)
+        record["ts"] = round(time.time(), 3)
+        records = getattr(_local, "records", None)
+        if records is not None:
+            records.append(record)
+        _emit(record)
@@ -0,0 +1,201 @@
+"""Przygotowany zbiór danych: znormalizowane kolumny liczone raz na wczytaną ramkę.
+
+Streamlit wykonuje skrypt od nowa przy każdej zmianie widżetu; bez tego każdy rerun robił
+astype(str).str.strip() / pd.to_numeric na tych samych kolumnach (część dwukrotnie).
+PreparedDataset trzyma wyniki per kolumna (liczone przy pierwszym użyciu), a aplikacja
+cache'uje sam obiekt po dataset_key(df) (st.cache_resource).
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from .filters import FilterEngine
+from .profile import non_empty_bitmap, numeric_values, profile_columns
+from .search import SubstringIndex
+
+
+def dataset_key(df: pd.DataFrame) -> str:
+    """Stabilny identyfikator zawartości ramki (snapshot: źródło + hash treści)."""
+    key = df.attrs.get("dataset_key")
+    if key:
+        return key
+    if df.attrs.get("content_hash"):
+        key = f"{df.attrs.get('source', '')}:{df.attrs['content_hash']}"
+    else:
+        h = hashlib.sha256("\0".join(map(str, df.columns)).encode("utf-8"))
+        try:
+            h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+        except TypeError:
+            h.update(str(id(df)).encode())
+        key = "frame:" + h.hexdigest()
+    df.attrs["dataset_key"] = key
+    return key
+
+
+class CategoryIndex:
+    """Kolumna jako pd.Categorical + indeks kod -> pozycje wierszy.
+
+    Pozycje wierszy są posortowane po kodzie (order) z offsetami per kod, więc zaznaczenie
+    w multiselect to suma gotowych list wierszy zamiast isin po napisach całej kolumny.
+    """
+
+    def __init__(self, values: np.ndarray):
+        cat = pd.Categorical(values)
+        codes = np.asarray(cat.codes)
+        self.categories = cat.categories
+        self.n_rows = len(codes)
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.categories))
+        self._order = order[len(codes) - int(counts.sum()):]  # braki (kod -1) są na początku
+        self._offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    def rows(self, code: int) -> np.ndarray:
+        return self._order[self._offsets[code]:self._offsets[code + 1]]
+
+    def mask(self, selected) -> np.ndarray:
+        """Maska wierszy, których wartość jest na liście `selected` (OR po kodach)."""
+        out = np.zeros(self.n_rows, dtype=bool)
+        for code in self.categories.get_indexer(list(selected)):
+            if code >= 0:
+                out[self.rows(code)] = True
+        return out
+
+
+class KeyIndex:
+    """Indeks haszowy: wartość klucza (ID/SKU) -> pozycja wiersza (pierwsze wystąpienie).
+
+    Wyszukanie wielu kluczy to jedno get_indexer zamiast porównania całej kolumny z każdym.
+    Powtórzone klucze są wykrywane przy budowie: `duplicates` (klucz -> liczba wystąpień).
+    """
+
+    def __init__(self, values: np.ndarray):
+        keys = pd.Series(values, dtype=object)
+        present = keys.notna().to_numpy()
+        first = present & ~keys.duplicated().to_numpy()
+        self._rows = np.flatnonzero(first)
+        self._index = pd.Index(keys.to_numpy()[first], dtype=object)
+        repeated = np.flatnonzero(present & keys.duplicated(keep=False).to_numpy())
+        self.duplicates = keys.iloc[repeated].value_counts()
+        self._repeated_rows = {}
+        for pos, key in zip(repeated, keys.to_numpy()[repeated]):
+            self._repeated_rows.setdefault(key, []).append(pos)
+
+    def __len__(self):
+        return len(self._index)
+
+    def positions(self, keys) -> np.ndarray:
+        """Pozycje wierszy dla `keys` (-1: brak klucza; przy duplikatach – pierwsze wystąpienie)."""
+        found = self._index.get_indexer(pd.Index(list(keys), dtype=object))
+        return np.where(found >= 0, self._rows[found], -1)
+
+    def rows(self, key) -> np.ndarray:
+        """Wszystkie pozycje wierszy z kluczem `key` (pusta tablica, gdy go nie ma)."""
+        if key in self._repeated_rows:
+            return np.asarray(self._repeated_rows[key], dtype=np.int64)
+        pos = self.positions([key])
+        return pos[pos >= 0]
+
+
+class PreparedDataset:
+    def __init__(self, df: pd.DataFrame, key_col: str = None, search_cols=()):
+        """key_col – kolumna klucza (ID); jej indeks haszowy (z raportem duplikatów) budujemy od razu.
+        search_cols – kolumny, których indeks trigramowy też budujemy od razu (zamiast przy
+        pierwszym wpisanym znaku w polu wyszukiwania)."""
+        self.df = df
+        self.key = dataset_key(df)
+        self._text = {}
+        self._folded = {}
+        self._numeric = {}
+        self._bounds = {}
+        self._options = {}
+        self._categories = {}
+        self._search = {}
+        self._keys = {}
+        self._profiles = {}
+        self._non_empty = None
+        self.filters = FilterEngine(self)
+        self.key_col = key_col if key_col in df.columns else None
+        if self.key_col is not None:
+            self.key_index(self.key_col)
+        for col in search_cols:
+            if col in df.columns:
+                self.search_index(col)
+
+    def text(self, col: str) -> pd.Series:
+        """astype(str).str.strip() – porównania z opcjami multiselect."""
+        s = self._text.get(col)
+        if s is None:
+            s = self._text[col] = self.df[col].astype(str).str.strip()
+        return s
+
+    def folded(self, col: str) -> pd.Series:
+        """text(col) po casefold – porównania bez rozróżniania wielkości liter."""
+        s = self._folded.get(col)
+        if s is None:
+            s = self._folded[col] = self.text(col).str.casefold()
+        return s
+
+    def numeric(self, col: str) -> pd.Series:
+        s = self._numeric.get(col)
+        if s is None:
+            s = self._numeric[col] = numeric_values(self.df[col])
+        return s
+
+    def bounds(self, col: str):
+        """(min, max) kolumny liczbowej albo None, gdy nie ma w niej żadnej liczby."""
+        if col not in self._bounds:
+            s = self.numeric(col)
+            self._bounds[col] = (float(s.min()), float(s.max())) if s.notna().any() else None
+        return self._bounds[col]
+
+    def category_index(self, col: str, casefold: bool = False) -> CategoryIndex:
+        """Indeks po text(col) (albo folded(col)); braki w kolumnie nie trafiają do żadnego kodu."""
+        cache_key = (col, casefold)
+        idx = self._categories.get(cache_key)
+        if idx is None:
+            values = (self.folded(col) if casefold else self.text(col)).to_numpy(dtype=object, copy=True)
+            values[self.df[col].isna().to_numpy()] = np.nan
+            idx = self._categories[cache_key] = CategoryIndex(values)
+        return idx
+
+    def options(self, col: str, key=None) -> list:
+        """Posortowane unikalne wartości (bez braków, po strip) – opcje multiselect."""
+        cache_key = (col, key)
+        opts = self._options.get(cache_key)
+        if opts is None:
+            categories = self.category_index(col).categories
+            opts = self._options[cache_key] = sorted((str(c) for c in categories), key=key)
+        return opts
+
+    def search_index(self, col: str) -> SubstringIndex:
+        """Indeks trigramowy po text(col) – budowany przy pierwszym wyszukiwaniu w tej kolumnie."""
+        idx = self._search.get(col)
+        if idx is None:
+            idx = self._search[col] = SubstringIndex(self.text(col).to_numpy())
+        return idx
+
+    def key_index(self, col: str) -> KeyIndex:
+        """Indeks haszowy po text(col) (braki pominięte) – budowany raz na kolumnę."""
+        idx = self._keys.get(col)
+        if idx is None:
+            values = self.text(col).to_numpy(dtype=object, copy=True)
+            values[self.df[col].isna().to_numpy()] = None
+            idx = self._keys[col] = KeyIndex(values)
+        return idx
+
+    def column_profiles(self, cols) -> dict:
+        """Profile kolumn (shoperxml.profile) – brakujące liczone równolegle, potem z pamięci."""
+        missing = [c for c in cols if c not in self._profiles]
+        if missing:
+            self._profiles.update(profile_columns(self.df, missing))
+        return {c: self._profiles[c] for c in cols}
+
+    def non_empty_columns(self, mask: np.ndarray) -> list:
+        """Kolumny mające choć jedną wartość w wierszach z maski – AND spakowanej maski
+        z bitmapą „niepustych” (liczoną raz) i redukcja po wierszach."""
+        if self._non_empty is None:
+            self._non_empty = non_empty_bitmap(self.df)
+        packed_mask = np.packbits(np.asarray(mask, dtype=bool))
+        hits = (self._non_empty & packed_mask[:, None]).any(axis=0)
+        return [c for c, hit in zip(self.df.columns, hits) if hit]
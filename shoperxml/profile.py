@@ -0,0 +1,77 @@
+"""Profil kolumn atrybutów dla automatycznych filtrów (XML).
+
+Liczony raz na zbiór (PreparedDataset.column_profiles), równolegle po kolumnach. Wcześniej
+każdy rerun robił dla każdej kolumny kilka pełnych przebiegów (strip, unique, to_numeric).
+"""
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+MAX_OPTIONS = 100        # powyżej – pole „zawiera” zamiast multiselect
+NUMERIC_MIN_RATIO = 0.6  # udział wartości liczbowych, od którego kolumna jest liczbowa
+
+ColumnProfile = namedtuple(
+    "ColumnProfile",
+    "non_empty numeric_ratio is_numeric bounds n_unique options",
+)
+
+
+def _is_categorical(series: pd.Series) -> bool:
+    return isinstance(series.dtype, pd.CategoricalDtype)
+
+
+def numeric_values(series: pd.Series) -> pd.Series:
+    """pd.to_numeric(errors="coerce"); dla category – konwersja samych kategorii i rozwinięcie kodami."""
+    if not _is_categorical(series):
+        return pd.to_numeric(series, errors="coerce")
+    categories = pd.to_numeric(pd.Series(series.cat.categories.astype(object)), errors="coerce")
+    codes = series.cat.codes.to_numpy()
+    values = np.append(categories.to_numpy(dtype=float), np.nan)  # kod -1 (brak) -> ostatni = NaN
+    return pd.Series(values[codes], index=series.index)
+
+
+def profile_column(series: pd.Series) -> ColumnProfile:
+    text = series.astype(str).str.strip()
+    if not (text != "").any():
+        return ColumnProfile(False, 0.0, False, None, 0, None)
+
+    num = numeric_values(series)
+    present = num.notna()
+    ratio = float(present.mean()) if len(series) else 0.0
+    bounds = (float(num.min()), float(num.max())) if present.any() else None
+
+    uniques = pd.unique(text[series.notna()].to_numpy())
+    options = sorted((str(u) for u in uniques), key=str.lower) if len(uniques) <= MAX_OPTIONS else None
+    return ColumnProfile(True, ratio, ratio >= NUMERIC_MIN_RATIO, bounds, len(uniques), options)
+
+
+def profile_columns(df: pd.DataFrame, cols, max_workers: int = None) -> dict:
+    cols = list(cols)
+    if not cols:
+        return {}
+    workers = max_workers or min(8, os.cpu_count() or 1, len(cols))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(cols, pool.map(lambda c: profile_column(df[c]), cols)))
+
+
+def non_empty_flags(series: pd.Series) -> np.ndarray:
+    """Wiersze z wartością (nie brak i nie pusty napis po strip)."""
+    if _is_categorical(series):
+        # flaga per kategoria, potem po kodach (kod -1 = brak)
+        per_category = ~pd.Series(series.cat.categories.astype(str)).str.strip().eq("").to_numpy()
+        return np.append(per_category, False)[series.cat.codes.to_numpy()]
+    return (series.notna() & ~series.astype(str).str.strip().eq("")).to_numpy()
+
+
+def non_empty_bitmap(df: pd.DataFrame, max_workers: int = None) -> np.ndarray:
+    """Macierz (ceil(wiersze/8), kolumny) uint8 – bity „niepuste” spakowane po wierszach."""
+    n_rows = len(df)
+    if not len(df.columns):
+        return np.zeros(((n_rows + 7) // 8, 0), dtype=np.uint8)
+    workers = max_workers or min(8, os.cpu_count() or 1, len(df.columns))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        packed = list(pool.map(lambda i: np.packbits(non_empty_flags(df.iloc[:, i])), range(len(df.columns))))
+    return np.stack(packed, axis=1)
@@ -0,0 +1,45 @@
+"""Nazwy kolumn wynikowych dla obu wariantów aplikacji.
+
+- APP_COLUMNS    – app.py (filtr ofert)
+- SHOPER_COLUMNS – base-inne-produkty-dodawanie-aktualizacja.py (nagłówki importu Shoper)
+"""
+
+APP_COLUMNS = {
+    "cat": "Kategoria",
+    "subcat": "Podkategoria",
+    "producer": "Producent",
+    "name": "Nazwa",
+    "price": "Cena",
+    "avail": "Dostępność",
+    "stock": "Liczba sztuk",
+    "stan": "Stan",
+    "id": "ID",
+    "sku": None,
+    "url": "URL",
+    "desc": "Opis HTML",
+    "img_prefix": "Zdjęcie ",
+}
+
+SHOPER_COLUMNS = {
+    "cat": "Nazwa kategorii",
+    "subcat": "Podkategoria",
+    "producer": "Nazwa producenta",
+    "name": "Nazwa produktu (PL)",
+    "price": "Cena (Domyślna (PLN))",
+    "avail": "Dostępność",
+    "stock": "Ilość (Domyślny)",
+    "stan": "Stan",
+    "id": "ID",
+    "sku": "SKU",  # SKU = ID
+    "url": "URL",
+    "desc": "Opis (PL)",
+    "img_prefix": "Zdjęcie produktu ",
+}
+
+# kolumny, bez których UI (render_app) i tryb wsadowy nie ruszają – klucze słowników wyżej
+REQUIRED_KEYS = ("cat", "producer", "name", "price", "avail")
+
+
+def missing_columns(df, cols: dict) -> list:
+    """Wymagane kolumny schematu `cols`, których nie ma w ramce."""
+    return [cols[k] for k in REQUIRED_KEYS if cols[k] not in df.columns]
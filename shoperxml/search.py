@@ -0,0 +1,61 @@
+"""Indeks trigramowy do wyszukiwania podciągów w kolumnach tekstowych (np. "Nazwa").
+
+Zamiast str.contains po całej kolumnie przy każdym rerunie:
+- unikalne wartości (po casefold) dostają numery, wiersze trzymają tylko numer wartości,
+- każdy trigram ma listę numerów wartości, które go zawierają,
+- fraza = słowa rozdzielone spacjami, wszystkie muszą wystąpić (AND); dla słowa >= 3 znaków
+  kandydaci to część wspólna list jego trigramów, potem zwykłe `in` tylko na kandydatach.
+- braki (NaN/None) traktujemy jak pusty napis – nie pasują do żadnego niepustego słowa.
+"""
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+GRAM = 3
+
+
+def _grams(text: str) -> set:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class SubstringIndex:
+    def __init__(self, values):
+        # braki przed factorize: kod -1 indeksowałby ostatnią unikalną wartość w mask()
+        folded = pd.Series(values, dtype=object).fillna("").astype(str).str.casefold()
+        codes, uniques = pd.factorize(folded)
+        self._values = list(uniques)
+        self._row_codes = codes
+        postings = defaultdict(list)
+        for i, value in enumerate(self._values):
+            for g in _grams(value):
+                postings[g].append(i)
+        self._postings = {g: np.asarray(ids, dtype=np.int32) for g, ids in postings.items()}
+
+    def _term_hits(self, term: str) -> np.ndarray:
+        """Maska po unikalnych wartościach: które zawierają `term`."""
+        hits = np.zeros(len(self._values), dtype=bool)
+        if len(term) < GRAM:
+            candidates = range(len(self._values))
+        else:
+            lists = [self._postings.get(g) for g in _grams(term)]
+            if any(ids is None for ids in lists):
+                return hits
+            lists.sort(key=len)
+            candidates = lists[0]
+            for ids in lists[1:]:
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+                if not len(candidates):
+                    return hits
+        values = self._values
+        matched = [i for i in candidates if term in values[i]]
+        hits[np.asarray(matched, dtype=np.int64)] = True
+        return hits
+
+    def mask(self, query: str) -> np.ndarray:
+        """Maska wierszy zawierających wszystkie słowa z `query` (bez rozróżniania wielkości liter)."""
+        terms = query.casefold().split()
+        hits = np.ones(len(self._values), dtype=bool)
+        for term in terms:
+            hits &= self._term_hits(term)
+        return hits[self._row_codes]
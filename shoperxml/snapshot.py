@@ -0,0 +1,225 @@
+"""Snapshoty sparsowanych feedów w Parquet (pyarrow).
+
+Snapshot jest wersjonowany źródłem (URL / nazwa pliku + sposób parsowania) i hashem
+surowej treści, więc nieaktualny nigdy nie zostanie podany – zmiana treści = nowy plik:
+
+    <cache>/snapshots/<klucz źródła>/<sha256 treści>.parquet
+
+Obok snapshotu może leżeć <sha256>.raw – surowa treść (opisy na żądanie, shoperxml.descriptions).
+
+Ostatnie KEEP_PER_SOURCE wersji źródła zostaje na dysku (kolejność wg mtime) – z nich
+shoperxml.diff bierze poprzednią wersję do porównania. Wersję można też oznaczyć nazwanym
+znacznikiem (<nazwa>.mark, np. ostatni eksport --delta) – oznaczone wersje nie są usuwane.
+
+Odczyt przez memory-map (pq.read_table(..., memory_map=True)). Kolumny tekstowe (w tym
+dynamiczne kolumny atrybutów) mają w schemacie jawny typ string. Ramki, których Arrow nie
+przyjmie (np. kolumna object z mieszanymi typami z CSV), lądują w .pkl obok.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_VERSION = 2     # podbić przy zmianie parsera -> stare snapshoty przestają pasować
+KEEP_PER_SOURCE = 5      # ile wersji jednego źródła trzymamy na dysku
+
+
+def cache_dir() -> Path:
+    path = Path(os.environ.get("SHOPERXML_CACHE_DIR") or Path.home() / ".cache" / "shoperxml")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+class HashingReader:
+    """Obiekt plikopodobny liczący sha256 tego, co przez niego przeczytano (np. iterparse).
+
+    tee – opcjonalny plik, do którego trafia kopia przeczytanych bajtów (surowy feed).
+    """
+
+    def __init__(self, raw, tee=None):
+        self._raw = raw
+        self._tee = tee
+        self.sha = hashlib.sha256()
+        self.n_bytes = 0
+
+    def read(self, n=None):
+        chunk = self._raw.read() if n is None or n < 0 else self._raw.read(n)
+        self.sha.update(chunk)
+        self.n_bytes += len(chunk)
+        if self._tee is not None:
+            self._tee.write(chunk)
+        return chunk
+
+    def hexdigest(self) -> str:
+        return self.sha.hexdigest()
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _source_dir(source: str) -> Path:
+    key = hashlib.sha256(f"{SNAPSHOT_VERSION}\0{source}".encode("utf-8")).hexdigest()[:24]
+    path = cache_dir() / "snapshots" / key
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _arrow_schema(df: pd.DataFrame):
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(schema):
+        if df[field.name].dtype == object:
+            schema = schema.set(i, pa.field(field.name, pa.string()))
+    return schema
+
+
+def _restore_missing(df: pd.DataFrame) -> pd.DataFrame:
+    # Arrow oddaje braki w kolumnach tekstowych jako None – świeży parse ma NaN
+    for c in df.columns:
+        s = df[c]
+        if s.dtype == object and s.hasnans:
+            df[c] = s.where(s.notna(), np.nan)
+    return df
+
+
+def _tag(df: pd.DataFrame, source: str, digest: str) -> pd.DataFrame:
+    df.attrs["source"] = source
+    df.attrs["content_hash"] = digest
+    return df
+
+
+def _history(folder: Path) -> list:
+    """Pliki snapshotów źródła, od najnowszego (pliki usunięte w międzyczasie są pomijane)."""
+    stamped = []
+    for p in folder.iterdir():
+        if p.suffix in {".parquet", ".pkl"}:
+            try:
+                stamped.append((p.stat().st_mtime, p))
+            except FileNotFoundError:
+                pass
+    return [p for _, p in sorted(stamped, key=lambda t: t[0], reverse=True)]
+
+
+def _marked(folder: Path) -> set:
+    """Hashe wersji wskazanych przez znaczniki (<nazwa>.mark) – _prune ich nie usuwa."""
+    digests = set()
+    for p in folder.glob("*.mark"):
+        try:
+            digests.add(p.read_text(encoding="utf-8").strip())
+        except OSError:
+            pass
+    return digests
+
+
+def _prune(folder: Path):
+    marked = _marked(folder)
+    for old in [p for p in _history(folder) if p.stem not in marked][KEEP_PER_SOURCE:]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".raw").unlink(missing_ok=True)
+
+
+def save_snapshot(df: pd.DataFrame, source: str, digest: str) -> pd.DataFrame:
+    """Zapisuje df jako snapshot (source, digest) i zwraca df z attrs source/content_hash."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    folder = _source_dir(source)
+    target = folder / f"{digest}.parquet"
+    if not (target.exists() or target.with_suffix(".pkl").exists()):
+        # unikalny plik tymczasowy – kilka sesji może zapisywać ten sam feed naraz
+        fd, tmp_name = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        os.close(fd)
+        tmp = Path(tmp_name)
+        try:
+            try:
+                table = pa.Table.from_pandas(df, schema=_arrow_schema(df), preserve_index=False)
+                pq.write_table(table, tmp)
+                final = target
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                df.to_pickle(tmp)
+                final = target.with_suffix(".pkl")
+            try:
+                os.replace(tmp, final)
+            except OSError:
+                # np. Windows: cel otwarty przez inną sesję – ta sama treść już jest na dysku
+                if not final.exists():
+                    raise
+        finally:
+            tmp.unlink(missing_ok=True)
+        _prune(folder)
+    else:
+        # ta sama treść wróciła (np. A -> B -> A) – znowu jest najnowszą wersją
+        existing = target if target.exists() else target.with_suffix(".pkl")
+        try:
+            os.utime(existing)
+        except FileNotFoundError:
+            pass  # usunięty w międzyczasie przez _prune innej sesji
+    return _tag(df, source, digest)
+
+
+def load_snapshot(source: str, digest: str):
+    """Snapshot (source, digest) albo None, jeśli go nie ma / jest nieczytelny."""
+    import pyarrow.parquet as pq
+
+    folder = _source_dir(source)
+    target = folder / f"{digest}.parquet"
+    try:
+        if target.exists():
+            df = _restore_missing(pq.read_table(target, memory_map=True).to_pandas())
+        elif target.with_suffix(".pkl").exists():
+            df = pd.read_pickle(target.with_suffix(".pkl"))
+        else:
+            return None
+    except Exception:
+        target.unlink(missing_ok=True)
+        target.with_suffix(".pkl").unlink(missing_ok=True)
+        return None
+    return _tag(df, source, digest)
+
+
+def load_previous_snapshot(source: str, digest: str):
+    """Najnowszy snapshot źródła o innej treści niż `digest` (poprzednia wersja) albo None."""
+    for path in _history(_source_dir(source)):
+        if path.stem != digest:
+            df = load_snapshot(source, path.stem)
+            if df is not None:
+                return df
+    return None
+
+
+def mark_snapshot(source: str, digest: str, name: str):
+    """Zapamiętuje wersję (source, digest) pod znacznikiem `name` (np. ostatni eksport)."""
+    folder = _source_dir(source)
+    fd, tmp_name = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(digest)
+        os.replace(tmp_name, folder / f"{name}.mark")
+    finally:
+        Path(tmp_name).unlink(missing_ok=True)
+
+
+def load_marked_snapshot(source: str, name: str):
+    """Wersja źródła wskazana znacznikiem `name` albo None (brak znacznika / snapshotu)."""
+    try:
+        digest = (_source_dir(source) / f"{name}.mark").read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return load_snapshot(source, digest)
+
+
+def raw_path(source: str, digest: str) -> Path:
+    """Ścieżka surowej treści wersji (source, digest) – plik może nie istnieć."""
+    return _source_dir(source) / f"{digest}.raw"
+
+
+def store_raw(source: str, digest: str, tmp: Path) -> Path:
+    """Przenosi plik tymczasowy z surową treścią do magazynu (obok snapshotu)."""
+    target = raw_path(source, digest)
+    os.replace(tmp, target)
+    return target
@@ -0,0 +1,155 @@
+"""Wczytywanie tabel CSV/XLSX (upload i CSV API).
+
+Separator i kodowanie wykrywamy na początku pliku (SNIFF_BYTES), a sam plik czyta szybki
+parser: silnik pyarrow (wielowątkowy), gdy jest zainstalowany, inaczej silnik C. Wolny
+sep=None/engine="python" został tylko jako ostatnia deska ratunku dla nietypowych plików.
+
+pyarrow sam rozpoznaje daty i czasy (datetime.date, Timestamp) – takie kolumny wracają jako
+oryginalny tekst, jak przy silniku C (eksport i snapshot Parquet dostają to samo co w pliku).
+"""
+import csv
+from io import BytesIO
+
+import pandas as pd
+
+from .feed_cache import fetch_parsed
+from .metrics import stage
+from .snapshot import content_hash, load_snapshot, save_snapshot
+
+SNIFF_BYTES = 64 * 1024
+ENCODINGS = ("utf-8-sig", "cp1250")
+DELIMITERS = ",;\t|"
+CHUNK_ROWS = 200_000
+
+
+def sniff_csv(head: bytes):
+    """(separator, kodowanie) z próbki początku pliku."""
+    # ucięta próbka może kończyć się w połowie wiersza (albo znaku) – bierzemy pełne wiersze
+    if len(head) >= SNIFF_BYTES and b"\n" in head:
+        head = head[:head.rindex(b"\n")]
+    for encoding in ENCODINGS:
+        try:
+            text = head.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+        encoding, text = "latin-1", head.decode("latin-1")
+    try:
+        sep = csv.Sniffer().sniff(text, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        sep = ","
+    return sep, encoding
+
+
+def _temporal_columns(df: pd.DataFrame) -> list:
+    """Kolumny, które pyarrow zamienił na daty/czasy (datetime64 albo object z date/time)."""
+    out = []
+    for c in df.columns:
+        s = df[c]
+        if s.dtype.kind == "M" or (
+            s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) in ("date", "time", "datetime")
+        ):
+            out.append(c)
+    return out
+
+
+def _restore_text(df: pd.DataFrame, source, sep: str, encoding: str, columns: list) -> pd.DataFrame:
+    """Drugi odczyt (pyarrow.csv) tylko kolumn `columns` jako string – dokładny tekst z pliku."""
+    import pyarrow as pa
+    from pyarrow import csv as pacsv
+
+    source.seek(0)
+    table = pacsv.read_csv(
+        source,
+        read_options=pacsv.ReadOptions(encoding=encoding),
+        parse_options=pacsv.ParseOptions(delimiter=sep),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=columns, column_types={c: pa.string() for c in columns}, strings_can_be_null=True,
+        ),
+    )
+    for c in columns:
+        df[c] = table.column(c).to_pandas()
+    return df
+
+
+def _fast_read_csv(source, sep: str, encoding: str) -> pd.DataFrame:
+    try:
+        import pyarrow  # noqa: F401 – silnik pyarrow w pandas wymaga pakietu
+    except ImportError:
+        return pd.read_csv(source, sep=sep, encoding=encoding, engine="c", low_memory=False)
+    try:
+        df = pd.read_csv(source, sep=sep, encoding=encoding, engine="pyarrow")
+        temporal = _temporal_columns(df)
+        return _restore_text(df, source, sep, encoding, temporal) if temporal else df
+    except (ValueError, KeyError, pyarrow.ArrowException):
+        # np. niezgodna liczba pól w wierszu albo powtórzone nazwy kolumn – silnik C jest
+        # bardziej wyrozumiały (i zostawia daty jako tekst)
+        source.seek(0)
+        return pd.read_csv(source, sep=sep, encoding=encoding, engine="c", low_memory=False)
+
+
+def read_csv_source(source) -> pd.DataFrame:
+    """CSV z obiektu plikopodobnego (z seek) – separator/kodowanie z próbki, szybki parser."""
+    head = source.read(SNIFF_BYTES)
+    source.seek(0)
+    sep, encoding = sniff_csv(head if isinstance(head, bytes) else head.encode("utf-8"))
+    try:
+        return _fast_read_csv(source, sep, encoding)
+    except ValueError:  # ParserError, UnicodeDecodeError
+        source.seek(0)
+    try:
+        return pd.read_csv(source, sep=None, engine="python", encoding=encoding)
+    except Exception:
+        source.seek(0)
+        return pd.read_csv(source, sep=",", engine="python", encoding=encoding)
+
+
+def iter_csv_chunks(source, chunk_rows: int = CHUNK_ROWS):
+    """CSV większy niż pamięć: kolejne ramki po `chunk_rows` wierszy (silnik C – pyarrow
+    nie czyta porcjami). Separator i kodowanie z próbki, jak w read_csv_source."""
+    head = source.read(SNIFF_BYTES)
+    source.seek(0)
+    sep, encoding = sniff_csv(head if isinstance(head, bytes) else head.encode("utf-8"))
+    with pd.read_csv(source, sep=sep, encoding=encoding, engine="c", chunksize=chunk_rows, low_memory=False) as reader:
+        yield from reader
+
+
+def _parse_table_file(file) -> pd.DataFrame:
+    name = file.name.lower()
+    if name.endswith((".xlsx", ".xlsm", ".xls")):
+        return pd.read_excel(file)
+    return read_csv_source(file)
+
+
+def read_table_file(file) -> pd.DataFrame:
+    """Plik z uploadu (ma .name) – XLSX/XLS/XLSM albo CSV; ten sam plik drugi raz = snapshot."""
+    data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+    file.seek(0)
+    source = f"upload:{file.name}"
+    digest = content_hash(data)
+    df = load_snapshot(source, digest)
+    if df is None:
+        with stage("parse_upload", file=file.name, bytes=len(data)) as rec:
+            df = save_snapshot(_parse_table_file(file), source, digest)
+            rec["rows"] = len(df)
+    return df
+
+
+def read_id_list(file) -> list:
+    """Lista kluczy (ID/SKU) z pliku: pierwsza kolumna CSV/TXT/XLSX, bez nagłówka ID/SKU."""
+    data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+    if file.name.lower().endswith((".xlsx", ".xlsm", ".xls")):
+        values = pd.read_excel(BytesIO(data), header=None, dtype=str).iloc[:, 0].dropna().tolist()
+    else:
+        sep, encoding = sniff_csv(data[:SNIFF_BYTES])
+        values = [line.split(sep)[0].strip().strip('"') for line in data.decode(encoding, errors="replace").splitlines()]
+    values = [v.strip() for v in values if v and v.strip()]
+    if values and values[0].casefold() in {"id", "sku"}:
+        values = values[1:]
+    return values
+
+
+def read_csv_url(url: str) -> pd.DataFrame:
+    """CSV z API – przez dyskowy cache z warunkowym GET."""
+    return fetch_parsed(url, lambda resp: read_csv_source(BytesIO(resp.read())), parser_tag="csv")
@@ -0,0 +1,30 @@
+"""Stronicowany widok wyniku: sortowanie i cięcie na strony po stronie serwera.
+
+Do przeglądarki trafia tylko bieżąca strona (st.dataframe), a liczniki i eksporty dalej
+obejmują cały wynik.
+"""
+import numpy as np
+import pandas as pd
+
+PAGE_SIZES = (50, 100, 250, 500, 1000)
+
+
+def sort_positions(df: pd.DataFrame, rows: np.ndarray, col, ascending: bool = True) -> np.ndarray:
+    """Pozycje `rows` uporządkowane wg kolumny `col` (braki na końcu, sortowanie stabilne)."""
+    s = df[col].iloc[rows].reset_index(drop=True)
+    try:
+        order = s.sort_values(ascending=ascending, na_position="last", kind="stable").index.to_numpy()
+    except TypeError:
+        # kolumna z mieszanymi typami – porządek tekstowy
+        order = s.astype(str).sort_values(ascending=ascending, kind="stable").index.to_numpy()
+    return rows[order]
+
+
+def page_count(n_rows: int, page_size: int) -> int:
+    return max(1, -(-n_rows // page_size))
+
+
+def page_slice(rows: np.ndarray, page: int, page_size: int) -> np.ndarray:
+    """Pozycje wierszy strony `page` (numeracja od 1)."""
+    start = (page - 1) * page_size
+    return rows[start:start + page_size]
@@ -0,0 +1,451 @@
+"""Parsowanie feedów XML (format Ceneo: <offers>…<o id price avail stock>…</o>) do DataFrame.
+
+Dwa silniki:
+- "stream" – ET.iterparse bezpośrednio po strumieniu (np. odpowiedź HTTP); każda <o> jest
+  przetwarzana zaraz po zamknięciu i usuwana z drzewa, więc w pamięci jest jedna oferta
+  + zebrane wiersze,
+- "tree"   – dawny tryb: całe bajty -> ET.fromstring -> root.findall(".//o").
+
+oraz dwa sposoby budowania ramki:
+- "columns" – ColumnBuilder: wartości dopisywane od razu do list per kolumna,
+- "rows"    – dawny tryb: lista dictów -> pd.DataFrame(rows).
+
+Wszystkie kombinacje dają identyczny DataFrame. Kolumny atrybutów (<attrs><a name=…>) są
+domyślnie typu category – rzadkie kolumny to wtedy kody int32 zamiast tablic obiektów.
+
+Duże feedy można parsować w kilku procesach (workers > 1): bajty dzielone są na granicach
+<o …>, każdy kawałek idzie do osobnego procesu (ColumnBuilder), a części są sklejane
+w kolejności z pliku. Gdy podział się nie uda (ParseError), parsujemy w jednym procesie.
+"""
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+
+from .feed_cache import fetch_parsed
+from .schema import APP_COLUMNS
+
+ENGINES = ("stream", "tree")
+BUILDERS = ("columns", "rows")
+AVAIL_ACTIVE = {"1", "true", "True", "tak", "TAK"}
+PARALLEL_MIN_CHUNK = 4 * 1024 * 1024  # mniejszych kawałków nie opłaca się wysyłać do procesów
+OFFER_START = re.compile(rb"<o[\s>]")
+_GROUP_TAG = re.compile(rb"</?group\b[^>]*>")
+
+
+def default_workers() -> int:
+    """Liczba procesów parsowania: SHOPERXML_XML_WORKERS (0 = liczba CPU), domyślnie 1."""
+    value = int(os.environ.get("SHOPERXML_XML_WORKERS", "1") or 1)
+    return value if value > 0 else (os.cpu_count() or 1)
+
+
+def _iter_offers_tree(source):
+    raw = source.read() if hasattr(source, "read") else source
+    root = ET.fromstring(raw)
+    yield from root.findall(".//o")
+
+
+def _iter_offers_stream(source):
+    # stos otwartych elementów – po zamknięciu <o> odpinamy ją od rodzica,
+    # żeby drzewo nie rosło razem z plikiem
+    stack = []
+    for event, el in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(el)
+            continue
+        stack.pop()
+        if el.tag == "o":
+            yield el
+            el.clear()
+            if stack:
+                stack[-1].remove(el)
+
+
+def iter_offers(source, engine: str = "stream"):
+    """Zwraca kolejne elementy <o> (w kolejności z dokumentu)."""
+    if engine == "stream":
+        return _iter_offers_stream(source)
+    if engine == "tree":
+        return _iter_offers_tree(source)
+    raise ValueError(f"Nieznany silnik XML: {engine!r} (dostępne: {', '.join(ENGINES)})")
+
+
+def desc_html(desc_el) -> str:
+    """Opis HTML z elementu <desc>: serializowane dzieci, a bez dzieci – sam tekst."""
+    return "".join(
+        ET.tostring(child, encoding="unicode", method="xml")
+        for child in list(desc_el)
+    ).strip() or (desc_el.text or "").strip()
+
+
+def offer_to_row(o, cols: dict = APP_COLUMNS, with_desc: bool = True) -> tuple:
+    """Jedna oferta -> (wiersz jako dict, liczba zdjęć).
+
+    with_desc=False – bez kolumny opisu (opisy na żądanie, shoperxml.descriptions).
+    """
+    oid   = (o.get("id") or "").strip()
+    ourl  = (o.get("url") or "").strip()
+    price = (o.get("price") or "").strip()
+    avail = (o.get("avail") or "").strip()
+    stock = (o.get("stock") or "").strip()
+    cat   = (o.findtext("cat")  or "").strip()
+    subcat = (o.findtext("subcat") or "").strip()
+    name  = (o.findtext("name") or "").strip()
+
+    # --- Opis HTML ---
+    desc = ""
+    desc_el = o.find("desc") if with_desc else None
+    if desc_el is not None:
+        desc = desc_html(desc_el)
+
+    # --- Zdjęcia ---
+    images = []
+    imgs_el = o.find("imgs")
+    if imgs_el is not None:
+        main_el = imgs_el.find("main")
+        if main_el is not None:
+            main_img = (main_el.get("url") or "").strip()
+            if main_img:
+                images.append(main_img)
+        for i_el in imgs_el.findall("i"):
+            u = (i_el.get("url") or "").strip()
+            if u:
+                images.append(u)
+
+    # --- Atrybuty ---
+    producent = ""
+    extra = {}
+    attrs_el = o.find("attrs")
+    if attrs_el is not None:
+        for a in attrs_el.findall("a"):
+            k = (a.get("name") or "").strip()
+            v = (a.text or "").strip()
+            if not k:
+                continue
+            extra[k] = v
+            if k.lower() == "producent":
+                producent = v
+
+    row = {
+        cols["cat"]: cat,
+        cols["subcat"]: subcat,
+        cols["producer"]: producent,
+        cols["name"]: name,
+        cols["price"]: price.replace(",", "."),
+        cols["avail"]: 1 if avail in AVAIL_ACTIVE else 99,
+        cols["stock"]: stock,
+        cols["id"]: oid,
+    }
+    if cols.get("sku"):
+        row[cols["sku"]] = oid
+    row[cols["url"]] = ourl
+    if with_desc:
+        row[cols["desc"]] = desc
+
+    for i, img in enumerate(images):
+        row[f"{cols['img_prefix']}{i+1}"] = img
+
+    # atrybuty jako kolumny (setki kolumn -> OK; przy compact_attrs kodowane jako category)
+    for k, v in extra.items():
+        if k not in row:
+            row[k] = v
+
+    return row, len(images)
+
+
+class ColumnBuilder:
+    """Budowanie DataFrame kolumnami zamiast listy dictów.
+
+    Rejestr kolumn trzyma kolejność pierwszego wystąpienia (jak pd.DataFrame(rows)).
+    Kolumna pełna (wartość w każdym wierszu) to zwykła lista wartości; przy pierwszej
+    luce dostaje listę pozycji wierszy, a braki są dopełniane NaN dopiero w build().
+
+    compact=True – kolumny spoza `dense` (i bez prefiksu `dense_prefix`), czyli atrybuty,
+    trzymają kody wartości (array int32 + słownik wartość -> kod) i wychodzą z build() jako
+    pd.Categorical: setki rzadkich kolumn atrybutów to wtedy tablice kodów zamiast tablic
+    wskaźników na osobne napisy.
+    """
+
+    def __init__(self, compact: bool = False, dense=(), dense_prefix: str = None):
+        self._values = {}     # nazwa -> list wartości (albo array kodów)
+        self._positions = {}  # nazwa -> array pozycji (tylko kolumny z lukami)
+        self._lookups = {}    # nazwa -> {wartość: kod} (tylko kolumny kodowane)
+        self._compact = compact
+        self._dense = frozenset(dense)
+        self._dense_prefix = dense_prefix
+        self.n_rows = 0
+
+    def _new_column(self, k):
+        if self._compact and k not in self._dense and not (
+            self._dense_prefix and str(k).startswith(self._dense_prefix)
+        ):
+            self._lookups[k] = {}
+            return array("i")
+        return []
+
+    def add(self, row: dict):
+        n = self.n_rows
+        lookups = self._lookups
+        for k, v in row.items():
+            values = self._values.get(k)
+            if values is None:
+                values = self._values[k] = self._new_column(k)
+                if n:
+                    self._positions[k] = array("q")
+            pos = self._positions.get(k)
+            if pos is None and len(values) != n:
+                # pierwsza luka – od teraz pamiętamy pozycje
+                pos = self._positions[k] = array("q", range(len(values)))
+            if pos is not None:
+                pos.append(n)
+            lookup = lookups.get(k)
+            values.append(v if lookup is None else lookup.setdefault(v, len(lookup)))
+        self.n_rows = n + 1
+
+    def extend(self, other: "ColumnBuilder"):
+        """Dopisuje wiersze z innego buildera (np. z kawałka feedu parsowanego osobno)."""
+        n = self.n_rows
+        for k, values in self._values.items():
+            if k not in other._values and k not in self._positions:
+                self._positions[k] = array("q", range(len(values)))
+        for k, values in other._values.items():
+            mine = self._values.get(k)
+            if mine is None:
+                mine = self._values[k] = self._new_column(k)
+            other_pos = other._positions.get(k)
+            pos = self._positions.get(k)
+            if pos is None and (len(mine) != n or other_pos is not None or len(values) != other.n_rows):
+                pos = self._positions[k] = array("q", range(len(mine)))
+            if pos is not None:
+                pos.extend(p + n for p in (other_pos if other_pos is not None else range(len(values))))
+            if k in other._lookups:
+                # kody drugiego buildera -> kody tego (wspólny słownik wartości)
+                lookup = self._lookups[k]
+                remap = [lookup.setdefault(v, len(lookup)) for v in other._lookups[k]]
+                values = array("i", (remap[c] for c in values))
+            mine.extend(values)
+        self.n_rows = n + other.n_rows
+
+    def _categorical(self, k, pos):
+        # kategorie posortowane (jak astype("category")), kody przemapowane na ten porządek;
+        # typ indeksu kategorii wnioskowany jak w astype("category") (pandas 3: str, wcześniej object),
+        # żeby obie ścieżki budowania i snapshot po odczycie dawały ten sam dtype
+        categories = np.asarray(list(self._lookups[k]), dtype=object)
+        order = np.argsort(categories, kind="stable")
+        remap = np.empty(len(order), dtype=np.int32)
+        remap[order] = np.arange(len(order), dtype=np.int32)
+        codes = np.full(self.n_rows, -1, dtype=np.int32)
+        codes[np.asarray(pos, dtype=np.int64)] = remap[np.frombuffer(self._values[k], dtype=np.int32)]
+        return pd.Categorical.from_codes(codes, categories=pd.Index(categories[order]))
+
+    def _column(self, k):
+        values = self._values[k]
+        pos = self._positions.get(k)
+        if pos is None:
+            pos = range(len(values))
+            if len(values) == self.n_rows and k not in self._lookups:
+                return values
+        if k in self._lookups:
+            return self._categorical(k, pos)
+        out = np.full(self.n_rows, np.nan, dtype=object)
+        out[np.asarray(pos, dtype=np.int64)] = np.asarray(values, dtype=object)
+        return out
+
+    def build(self) -> pd.DataFrame:
+        if not self.n_rows:
+            return pd.DataFrame()
+        return pd.DataFrame({k: self._column(k) for k in self._values})
+
+
+def compact_args(cols: dict) -> dict:
+    """Argumenty ColumnBuilder(compact=True) dla schematu: kodowane są tylko kolumny atrybutów."""
+    return {
+        "compact": True,
+        "dense": {v for k, v in cols.items() if k != "img_prefix" and v},
+        "dense_prefix": cols["img_prefix"],
+    }
+
+
+def compact_attributes(df: pd.DataFrame, cols: dict) -> pd.DataFrame:
+    """Kolumny atrybutów ramki jako category – ten sam wynik co ColumnBuilder(**compact_args(cols))."""
+    args = compact_args(cols)
+    for c in df.columns:
+        if c not in args["dense"] and not str(c).startswith(args["dense_prefix"]):
+            df[c] = df[c].astype("category")
+    return df
+
+
+def _strip_groups(segment: bytes) -> bytes:
+    """Usuwa znaczniki <group>/</group> spomiędzy ofert – treść ofert (np. opisy w CDATA) zostaje."""
+    parts, pos = [], 0
+    while pos < len(segment):
+        start = OFFER_START.search(segment, pos)
+        if start is None:
+            parts.append(_GROUP_TAG.sub(b"", segment[pos:]))
+            break
+        parts.append(_GROUP_TAG.sub(b"", segment[pos:start.start()]))
+        tag_end = segment.find(b">", start.start()) + 1
+        if tag_end == 0:
+            end = len(segment)
+        elif segment[tag_end - 2:tag_end] == b"/>":
+            end = tag_end  # <o …/> – oferta bez zawartości
+        else:
+            end = segment.find(b"</o>", tag_end)
+            end = len(segment) if end < 0 else end + len(b"</o>")
+        parts.append(segment[start.start():end])
+        pos = end
+    return b"".join(parts)
+
+
+def split_offers(raw: bytes, n_chunks: int) -> list:
+    """Dzieli feed na ~n_chunks samodzielnych dokumentów XML, tnąc tylko przed <o …>.
+
+    Każdy kawałek dostaje deklarację XML z oryginału i własny korzeń; znaczniki <group>
+    (formatu Ceneo) spomiędzy ofert są z kawałków usuwane, żeby nie zostały niedomknięte.
+    Pusta lista (-> parsowanie w jednym procesie), gdy feedu nie da się tak pociąć, np. oferty
+    są samozamykające (<o …/>) i po ostatnim </o> nie da się wyznaczyć końca ofert.
+    """
+    first = OFFER_START.search(raw)
+    if first is None:
+        return []
+    decl = raw[:raw.index(b"?>") + 2] if raw.startswith(b"<?xml") else b""
+    end = raw.rfind(b"</o>")
+    if end < 0:
+        return []
+    end += len(b"</o>")
+    if OFFER_START.search(raw, end):
+        return []  # samozamykające oferty za ostatnim </o> wypadłyby z kawałków
+    step = max(PARALLEL_MIN_CHUNK, (end - first.start()) // max(1, n_chunks) + 1)
+    bounds = [first.start()]
+    while True:
+        m = OFFER_START.search(raw, bounds[-1] + step)
+        if m is None or m.start() >= end:
+            break
+        bounds.append(m.start())
+    bounds.append(end)
+    return [
+        decl + b"<chunk>" + _strip_groups(raw[a:b]) + b"</chunk>"
+        for a, b in zip(bounds, bounds[1:])
+    ]
+
+
+def _new_builder(cols: dict, compact: bool) -> ColumnBuilder:
+    return ColumnBuilder(**compact_args(cols)) if compact else ColumnBuilder()
+
+
+def _parse_chunk(args):
+    """(ColumnBuilder, maks. liczba zdjęć) dla kawałka albo None, gdy kawałek nie jest poprawnym XML."""
+    chunk, cols, with_desc, compact = args
+    builder = _new_builder(cols, compact)
+    max_imgs = 0
+    try:
+        for o in iter_offers(BytesIO(chunk), "stream"):
+            row, n_imgs = offer_to_row(o, cols, with_desc)
+            max_imgs = max(max_imgs, n_imgs)
+            builder.add(row)
+    except ET.ParseError:
+        return None
+    return builder, max_imgs
+
+
+def _parse_parallel(raw: bytes, cols: dict, workers: int, with_desc: bool = True, compact: bool = True):
+    """Jak _parse_chunk, ale po kawałkach w puli procesów; None = trzeba parsować w jednym procesie."""
+    chunks = split_offers(raw, workers)
+    if len(chunks) < 2:
+        return None
+    builder, max_imgs = _new_builder(cols, compact), 0
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            # map zachowuje kolejność kawałków -> kolejność wierszy jak w pliku
+            for part in pool.map(_parse_chunk, [(c, cols, with_desc, compact) for c in chunks]):
+                if part is None:
+                    return None
+                builder.extend(part[0])
+                max_imgs = max(max_imgs, part[1])
+    except (OSError, BrokenProcessPool):
+        # brak możliwości uruchomienia procesów (np. ograniczone środowisko)
+        return None
+    return builder, max_imgs
+
+
+def parse_xml_feed(
+    source, cols: dict = APP_COLUMNS, engine: str = "stream", build: str = "columns", workers: int = 1,
+    lazy_desc: bool = False, compact_attrs: bool = True,
+) -> pd.DataFrame:
+    """source: bajty albo obiekt plikopodobny (np. strumień odpowiedzi HTTP).
+
+    workers > 1 – parsowanie w kilku procesach (wymaga wczytania całego feedu do pamięci);
+    engine/build są wtedy pomijane, wynik jest taki sam.
+    lazy_desc – bez kolumny opisu; opisy czyta później shoperxml.descriptions z surowego feedu.
+    compact_attrs – kolumny atrybutów jako category (ColumnBuilder(compact=True)).
+    """
+    if build not in BUILDERS:
+        raise ValueError(f"Nieznany tryb budowania: {build!r} (dostępne: {', '.join(BUILDERS)})")
+
+    parsed = None
+    if workers > 1:
+        raw = source.read() if hasattr(source, "read") else bytes(source)
+        # None: za mały feed na podział albo kawałki nie są poprawnym XML – jeden proces
+        parsed = _parse_parallel(raw, cols, workers, not lazy_desc, compact_attrs)
+        source = raw
+    if parsed is not None:
+        builder, max_imgs = parsed
+    else:
+        if engine == "stream" and isinstance(source, (bytes, bytearray)):
+            source = BytesIO(source)
+        builder = _new_builder(cols, compact_attrs) if build == "columns" else None
+        rows = []
+        max_imgs = 0  # maks liczba zdjęć
+        for o in iter_offers(source, engine):
+            row, n_imgs = offer_to_row(o, cols, not lazy_desc)
+            max_imgs = max(max_imgs, n_imgs)
+            if builder is not None:
+                builder.add(row)
+            else:
+                rows.append(row)
+
+    if builder is not None:
+        df = builder.build()
+    else:
+        df = pd.DataFrame(rows)
+        if compact_attrs:
+            df = compact_attributes(df, cols)
+
+    # Ujednolicenie liczby kolumn zdjęć
+    for i in range(1, max_imgs + 1):
+        col = f"{cols['img_prefix']}{i}"
+        if col not in df.columns:
+            df[col] = ""
+
+    # Typy liczbowe
+    for c in (cols["price"], cols["avail"], cols["stock"]):
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+
+    return df
+
+
+def read_xml_url(
+    url: str, cols: dict = APP_COLUMNS, engine: str = "stream", build: str = "columns", workers=None,
+    lazy_desc: bool = False,
+) -> pd.DataFrame:
+    """Pobiera i parsuje feed; niezmieniony feed (304) wraca z dyskowego cache.
+
+    workers=None – default_workers() (zmienna SHOPERXML_XML_WORKERS).
+    lazy_desc – ramka bez opisów, surowy feed zostaje na dysku obok snapshotu
+    (shoperxml.descriptions.open_descriptions).
+    """
+    workers = default_workers() if workers is None else workers
+    return fetch_parsed(
+        url,
+        lambda resp: parse_xml_feed(resp, cols, engine=engine, build=build, workers=workers, lazy_desc=lazy_desc),
+        parser_tag="xml:" + json.dumps(cols, sort_keys=True) + (":lazy-desc" if lazy_desc else ""),
+        keep_raw=lazy_desc,
+    )
@@ -0,0 +1,34 @@
+"""Wspólne dane testowe: syntetyczny feed XML (format jak z GitHub/esolu-hub)."""
+import pytest
+
+
+def _offer(i: int) -> str:
+    if i % 7 == 3:
+        return f'<o id="{i}" url="u{i}" price="{i},50" avail="1" stock="1"/>'
+    # kolumny różne w różnych częściach feedu: atrybuty tylko od pewnego miejsca, różna liczba zdjęć
+    attrs = "".join(f'<a name="Atrybut {i // 10 + k}">{i % 5}</a>' for k in range(i % 3))
+    imgs = "".join(f'<i url="img{i}_{k}.jpg"/>' for k in range(i % 4))
+    return (
+        f'<o id="{i}" url="u{i}" price="{i},99" avail="{1 if i % 2 else 99}" stock="{i % 9}">'
+        f"<cat>Kategoria {i % 4}</cat><name>Produkt {i}</name>"
+        f'<desc><![CDATA[<p>Opis {i} <group name="x">nie znacznik</group></p>]]></desc>'
+        f'<imgs><main url="img{i}.jpg"/>{imgs}</imgs><attrs><a name="Producent">P{i % 3}</a>{attrs}</attrs></o>'
+    )
+
+
+def _feed(n: int, last_self_closing: bool = False) -> bytes:
+    offers = [_offer(i) for i in range(n)]
+    if last_self_closing:
+        offers.append(f'<o id="{n}" url="u{n}" price="1" avail="1" stock="1"/>')
+    half = len(offers) // 2
+    body = (
+        '<group name="a">' + "\n".join(offers[:half]) + "</group>\n"
+        '<group name="b">' + "\n".join(offers[half:]) + "</group>"
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><offers>{body}</offers>'.encode("utf-8")
+
+
+@pytest.fixture
+def make_feed():
+    """make_feed(n, last_self_closing=False) -> bajty feedu z n ofertami w dwóch <group>."""
+    return _feed
@@ -0,0 +1,70 @@
+import json
+
+import pandas as pd
+import pytest
+
+from shoperxml.cli import main
+
+
+def _feed(prices: dict) -> bytes:
+    offers = "".join(
+        f'<o id="{i}" price="{p}" avail="1" stock="5" url="u{i}"><cat>K</cat><name>Oferta {i}</name>'
+        f'<attrs><a name="Producent">P</a></attrs></o>'
+        for i, p in prices.items()
+    )
+    return f'<?xml version="1.0" encoding="utf-8"?><offers>{offers}</offers>'.encode("utf-8")
+
+
+@pytest.fixture
+def job(tmp_path, monkeypatch):
+    monkeypatch.setenv("SHOPERXML_CACHE_DIR", str(tmp_path / "cache"))
+    feed = tmp_path / "feed.xml"
+    config = tmp_path / "filters.json"
+    config.write_text(json.dumps({"status": "Wszystkie"}), encoding="utf-8")
+
+    def run(prices: dict, out: str = "delta.csv", cfg=config):
+        feed.write_bytes(_feed(prices))
+        argv = ["filter", "--source", str(feed), "--config", str(cfg), "--delta", "--out", str(tmp_path / out)]
+        assert main(argv) == 0
+        result = pd.read_csv(tmp_path / out, dtype=str)
+        removed_path = tmp_path / out.replace(".csv", "-usuniete.csv")
+        removed = pd.read_csv(removed_path, dtype=str) if removed_path.exists() else None
+        return result, removed
+
+    return run
+
+
+def test_delta_sequence_added_changed_removed(job):
+    prices = {i: f"{10 + i}.00" for i in range(10)}
+
+    result, removed = job(prices)
+    assert len(result) == 10  # pierwsze uruchomienie – całość
+    assert removed is None
+
+    result, removed = job(prices)  # ten sam feed – pusta delta, ale z nagłówkiem
+    assert len(result) == 0 and "ID" in result.columns
+    assert len(removed) == 0 and "ID" in removed.columns
+
+    prices[3] = "99.00"
+    del prices[7]
+    prices[10] = "5.00"
+    result, removed = job(prices)
+    assert sorted(result["ID"]) == ["10", "3"]
+    assert removed["ID"].tolist() == ["7"]
+
+    result, removed = job(prices)  # plik usuniętych nadpisany, nie zostaje z poprzedniego razu
+    assert len(result) == 0 and len(removed) == 0
+
+
+def test_jobs_on_the_same_feed_keep_separate_baselines(job, tmp_path):
+    prices = {i: "10.00" for i in range(5)}
+    other = tmp_path / "other.json"
+    other.write_text(json.dumps({"status": "Aktywne"}), encoding="utf-8")
+
+    job(prices, "a.csv")
+    job(prices, "b.csv", other)
+    prices[2] = "11.00"
+    result_a, _ = job(prices, "a.csv")
+    result_b, _ = job(prices, "b.csv", other)
+    assert result_a["ID"].tolist() == ["2"]
+    assert result_b["ID"].tolist() == ["2"]  # job A nie przesunął punktu odniesienia joba B
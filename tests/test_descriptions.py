@@ -0,0 +1,26 @@
+from shoperxml.descriptions import scan_desc_offsets
+from shoperxml.xml_feed import parse_xml_feed
+
+FEED = (
+    b'<?xml version="1.0" encoding="utf-8"?><offers>'
+    b'<o id="1" price="1" avail="1" url="u1"/>'
+    b'<o id="2" price="2" avail="1" url="u2"><name>B</name><desc><![CDATA[<p>opis 2</p>]]></desc></o>'
+    b'<o id="3" price="3" avail="1" url="u3"><name>C</name><desc/></o>'
+    b'<o id="4" price="4" avail="1" url="u4"><name>D</name></o>'
+    b'</offers>'
+)
+
+
+def test_self_closing_offer_has_no_description():
+    offsets = scan_desc_offsets(FEED)
+    assert len(offsets) == 4
+    assert tuple(offsets[0]) == (-1, -1)
+    start, end = offsets[1]
+    assert FEED[start:end] == b"<desc><![CDATA[<p>opis 2</p>]]></desc>"
+    assert FEED[offsets[2][0]:offsets[2][1]] == b"<desc/>"
+    assert tuple(offsets[3]) == (-1, -1)
+
+
+def test_offsets_follow_parsed_rows():
+    df = parse_xml_feed(FEED, lazy_desc=True)
+    assert len(scan_desc_offsets(FEED)) == len(df)
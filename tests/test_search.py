@@ -0,0 +1,14 @@
+import numpy as np
+
+from shoperxml.search import SubstringIndex
+
+
+def test_missing_values_never_match():
+    idx = SubstringIndex(np.array(["abc", np.nan, "xyz", None], dtype=object))
+    assert idx.mask("xyz").tolist() == [False, False, True, False]
+    assert idx.mask("ab").tolist() == [True, False, False, False]
+
+
+def test_all_terms_required_case_insensitive():
+    idx = SubstringIndex(np.array(["Kabel USB-C", "kabel HDMI", "Ładowarka USB"], dtype=object))
+    assert idx.mask("usb KABEL").tolist() == [True, False, False]
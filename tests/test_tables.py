@@ -0,0 +1,30 @@
+from io import BytesIO
+
+import pandas as pd
+
+from shoperxml.snapshot import save_snapshot
+from shoperxml.tables import read_csv_source
+
+CSV = (
+    "ID;Nazwa;Cena;data_dodania;godzina;zmiana\n"
+    "1;Kabel;19.99;2024-01-05;10:00:00;2024-01-05 10:00\n"
+    "2;Ładowarka;49.5;;11:30:00;2024-02-06T08:15:00\n"
+).encode("utf-8-sig")
+
+
+def test_dates_stay_as_original_text():
+    df = read_csv_source(BytesIO(CSV))
+    assert list(df.columns) == ["ID", "Nazwa", "Cena", "data_dodania", "godzina", "zmiana"]
+    assert df["data_dodania"].tolist()[0] == "2024-01-05" and pd.isna(df["data_dodania"].iloc[1])
+    assert df["godzina"].tolist() == ["10:00:00", "11:30:00"]
+    assert df["zmiana"].tolist() == ["2024-01-05 10:00", "2024-02-06T08:15:00"]
+    assert df["Cena"].tolist() == [19.99, 49.5]
+    c_engine = pd.read_csv(BytesIO(CSV), sep=";", encoding="utf-8-sig", engine="c")
+    pd.testing.assert_frame_equal(df, c_engine, check_dtype=False)
+
+
+def test_csv_with_dates_snapshots_to_parquet(tmp_path, monkeypatch):
+    monkeypatch.setenv("SHOPERXML_CACHE_DIR", str(tmp_path))
+    save_snapshot(read_csv_source(BytesIO(CSV)), "test.csv", "abc")
+    saved = [p.name for p in (tmp_path / "snapshots").rglob("abc.*")]
+    assert saved == ["abc.parquet"]
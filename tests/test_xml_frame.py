@@ -0,0 +1,122 @@
+"""Ramka z parse_xml_feed (budowa kolumnami, ColumnBuilder/extend) vs dawne read_xml_build_df."""
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+import pytest
+
+from shoperxml import xml_feed
+from shoperxml.schema import APP_COLUMNS
+from shoperxml.xml_feed import compact_args, parse_xml_feed
+
+
+def baseline_build_df(raw: bytes) -> pd.DataFrame:
+    """read_xml_build_df sprzed zmian (app.py, commit bazowy) – bez pobierania z URL."""
+    root = ET.fromstring(raw)
+    rows = []
+    max_imgs = 0
+    for o in root.findall(".//o"):
+        oid = (o.get("id") or "").strip()
+        ourl = (o.get("url") or "").strip()
+        price = (o.get("price") or "").strip()
+        avail = (o.get("avail") or "").strip()
+        stock = (o.get("stock") or "").strip()
+        cat = (o.findtext("cat") or "").strip()
+        subcat = (o.findtext("subcat") or "").strip()
+        name = (o.findtext("name") or "").strip()
+
+        desc_html = ""
+        desc_el = o.find("desc")
+        if desc_el is not None:
+            desc_html = "".join(
+                ET.tostring(child, encoding="unicode", method="xml") for child in list(desc_el)
+            ).strip() or (desc_el.text or "").strip()
+
+        images = []
+        imgs_el = o.find("imgs")
+        if imgs_el is not None:
+            main_el = imgs_el.find("main")
+            if main_el is not None:
+                main_img = (main_el.get("url") or "").strip()
+                if main_img:
+                    images.append(main_img)
+            for i_el in imgs_el.findall("i"):
+                u = (i_el.get("url") or "").strip()
+                if u:
+                    images.append(u)
+        max_imgs = max(max_imgs, len(images))
+
+        producent = ""
+        extra = {}
+        attrs_el = o.find("attrs")
+        if attrs_el is not None:
+            for a in attrs_el.findall("a"):
+                k = (a.get("name") or "").strip()
+                v = (a.text or "").strip()
+                if not k:
+                    continue
+                extra[k] = v
+                if k.lower() == "producent":
+                    producent = v
+
+        row = {
+            "Kategoria": cat,
+            "Podkategoria": subcat,
+            "Producent": producent,
+            "Nazwa": name,
+            "Cena": price.replace(",", "."),
+            "Dostępność": 1 if avail in {"1", "true", "True", "tak", "TAK"} else 99,
+            "Liczba sztuk": stock,
+            "ID": oid,
+            "URL": ourl,
+            "Opis HTML": desc_html,
+        }
+        for i, img in enumerate(images):
+            row[f"Zdjęcie {i + 1}"] = img
+        for k, v in extra.items():
+            if k not in row:
+                row[k] = v
+        rows.append(row)
+
+    df = pd.DataFrame(rows)
+    for i in range(1, max_imgs + 1):
+        col = f"Zdjęcie {i}"
+        if col not in df.columns:
+            df[col] = ""
+    for c in ("Cena", "Dostępność", "Liczba sztuk"):
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df
+
+
+@pytest.fixture
+def raw(make_feed):
+    return make_feed(120)
+
+
+@pytest.mark.parametrize("engine", xml_feed.ENGINES)
+def test_columns_builder_matches_baseline(raw, engine):
+    df = parse_xml_feed(raw, engine=engine, build="columns", compact_attrs=False)
+    pd.testing.assert_frame_equal(df, baseline_build_df(raw))
+
+
+def test_extend_matches_single_builder(raw, monkeypatch):
+    monkeypatch.setattr(xml_feed, "PARALLEL_MIN_CHUNK", 1024)
+    df = parse_xml_feed(raw, workers=2, compact_attrs=False)
+    pd.testing.assert_frame_equal(df, baseline_build_df(raw))
+
+
+def test_compact_attrs_dtypes(raw):
+    df = parse_xml_feed(raw)
+    args = compact_args(APP_COLUMNS)
+    attr_cols = [c for c in df.columns if c not in args["dense"] and not str(c).startswith(args["dense_prefix"])]
+    assert attr_cols and "Atrybut 0" in attr_cols
+    for c in attr_cols:
+        assert isinstance(df[c].dtype, pd.CategoricalDtype), c
+        # ten sam typ kategorii co astype("category") na kolumnie tekstowej i po odczycie snapshotu
+        assert df[c].cat.categories.dtype == pd.Series(["x"]).astype("category").cat.categories.dtype, c
+    for c in ("Cena", "Dostępność", "Liczba sztuk"):
+        assert pd.api.types.is_numeric_dtype(df[c]), c
+    wide = parse_xml_feed(raw, compact_attrs=False)
+    pd.testing.assert_frame_equal(df.astype(wide.dtypes.to_dict()), wide)
+    rows = parse_xml_feed(raw, build="rows")
+    pd.testing.assert_frame_equal(df, rows)
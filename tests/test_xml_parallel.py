@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+
+from shoperxml import xml_feed
+from shoperxml.xml_feed import parse_xml_feed, split_offers
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(xml_feed, "PARALLEL_MIN_CHUNK", 1024)
+
+
+@pytest.mark.parametrize("lazy_desc", [False, True])
+def test_parallel_matches_single_process(make_feed, lazy_desc):
+    raw = make_feed(201)  # ostatnia oferta zwykła – feed da się pociąć
+    assert len(split_offers(raw, 3)) >= 2  # naprawdę idzie ścieżką równoległą
+    assert xml_feed._parse_parallel(raw, xml_feed.APP_COLUMNS, 3) is not None  # bez cichego fallbacku
+    single = parse_xml_feed(raw, workers=1, lazy_desc=lazy_desc)
+    parallel = parse_xml_feed(raw, workers=3, lazy_desc=lazy_desc)
+    pd.testing.assert_frame_equal(parallel, single)
+    assert len(single) == 201
+
+
+def test_group_tags_stripped_only_between_offers(make_feed):
+    raw = make_feed(41)
+    chunks = split_offers(raw, 2)
+    assert len(chunks) == 2
+    joined = b"".join(chunks)
+    assert b'<group name="a">' not in joined and b'<group name="b">' not in joined
+    n_with_desc = sum(1 for i in range(41) if i % 7 != 3)
+    assert joined.count(b'<group name="x">nie znacznik</group>') == n_with_desc
+    desc = parse_xml_feed(raw, workers=2)["Opis HTML"]
+    assert desc.iloc[0] == '<p>Opis 0 <group name="x">nie znacznik</group></p>'
+
+
+def test_self_closing_offers_fall_back_to_single_process(make_feed):
+    only_self_closing = (
+        b"<offers>" + b"".join(b'<o id="%d" url="u" price="1" avail="1"/>' % i for i in range(300)) + b"</offers>"
+    )
+    assert split_offers(only_self_closing, 2) == []
+    assert len(parse_xml_feed(only_self_closing, workers=2)) == 300
+
+    trailing = make_feed(100, last_self_closing=True)
+    assert split_offers(trailing, 2) == []
+    pd.testing.assert_frame_equal(parse_xml_feed(trailing, workers=2), parse_xml_feed(trailing, workers=1))